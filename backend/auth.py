@@ -4,7 +4,11 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from typing import Optional
 from models import UserResponse
+from cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import time
 import hashlib
 import secrets
 
@@ -16,6 +20,11 @@ SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "your-secret-key-change-in-product
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Decoded token claims are memoized per token string (never beyond the token's expiry)
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+token_cache = TTLCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     # Simple hash verification for testing
@@ -31,6 +40,83 @@ def get_password_hash(password: str) -> str:
     password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
     return salt + password_hash.hex()
 
+# PBKDF2 runs in a bounded thread pool so it never blocks the event loop
+# (hashlib releases the GIL while hashing)
+HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_POOL_MAX_PENDING = int(os.environ.get("HASH_POOL_MAX_PENDING", "64"))
+HASH_POOL_RETRY_AFTER = int(os.environ.get("HASH_POOL_RETRY_AFTER", "1"))
+
+class PasswordHashPool:
+    """Size-bounded worker pool for password hashing with queue-depth limit and timing metrics"""
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool, or raise 503 when the queue is full"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": str(HASH_POOL_RETRY_AFTER)},
+            )
+        
+        submitted = time.perf_counter()
+        
+        def job():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started - submitted, time.perf_counter() - started
+        
+        self.pending += 1
+        try:
+            result, queue_wait, hash_time = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+        
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += hash_time
+        self.hash_time_max = max(self.hash_time_max, hash_time)
+        return result
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": round(self.queue_wait_total / self.completed * 1000, 2) if self.completed else 0.0,
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 2),
+            "hash_time_avg_ms": round(self.hash_time_total / self.completed * 1000, 2) if self.completed else 0.0,
+            "hash_time_max_ms": round(self.hash_time_max * 1000, 2),
+        }
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+password_hash_pool = PasswordHashPool(HASH_POOL_WORKERS, HASH_POOL_MAX_PENDING)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the hashing pool"""
+    return await password_hash_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -45,11 +131,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(token: str) -> Optional[str]:
     """Verify JWT token and return user ID"""
+    entry = token_cache.get(token)
+    if entry is not None and entry.is_fresh():
+        return entry.value
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
+        
+        ttl = min(TOKEN_CACHE_TTL, payload.get("exp", 0) - time.time())
+        if ttl > 0:
+            token_cache.set(token, user_id, ttl)
         return user_id
     except JWTError:
         return None
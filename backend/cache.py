@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached value with its freshness deadlines (monotonic seconds)"""
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.expires_at
+
+    def is_servable(self, now: Optional[float] = None) -> bool:
+        """Fresh, or expired but still inside the stale-while-revalidate window"""
+        return (now if now is not None else time.monotonic()) < self.stale_until
+
+
+class TTLCache:
+    """In-process cache with per-entry TTL, a stale window and LRU eviction.
+
+    Expired entries are kept until they are evicted so callers can still
+    fall back to the last known value; use CacheEntry.is_fresh/is_servable
+    to decide what to do with a hit.
+    """
+
+    def __init__(self, max_entries: int = 5000, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key (fresh or not) and mark it recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key without counting a lookup or touching LRU order"""
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> CacheEntry:
+        """Store value for ttl seconds, evicting least recently used entries"""
+        now = time.monotonic()
+        entry = CacheEntry(value, now + ttl, now + ttl + self.stale_ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task.
+
+    The first caller starts the task, later callers await the same result.
+    Errors are delivered to every waiter and are not remembered, so the next
+    call retries. A cancelled waiter does not cancel the shared task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class MongoCache:
+    """Second-tier cache shared by all workers, stored in a MongoDB collection.
+
+    Payloads are stored as zlib-compressed compact JSON. Documents are
+    removed by a TTL index once their stale window has passed. Writes are
+    buffered and flushed in the background with one bulk upsert.
+    """
+
+    def __init__(self, collection, stale_ttl: float = 0, flush_interval: float = 1.0, max_pending: int = 200):
+        self.collection = collection
+        self.stale_ttl = stale_ttl
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flush_timer: Optional["asyncio.Task"] = None
+        self._tasks = set()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("purge_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def decode(payload: bytes) -> Any:
+        return json.loads(zlib.decompress(payload))
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, seconds of freshness left) for a fresh entry, else None"""
+        pending = self._pending.get(key)
+        try:
+            doc = pending or await self.collection.find_one({"_id": key})
+        except Exception as e:
+            logger.warning("L2 cache read for %s failed: %s", key, e)
+            return None
+        if not doc:
+            return None
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+        if remaining <= 0:
+            return None
+        return self.decode(doc["payload"]), remaining
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Queue a write; it reaches MongoDB on the next background flush"""
+        now = datetime.utcnow()
+        self._pending[key] = {
+            "payload": self.encode(value),
+            "expires_at": now + timedelta(seconds=ttl),
+            "purge_at": now + timedelta(seconds=ttl + self.stale_ttl),
+        }
+        if len(self._pending) >= self.max_pending:
+            self._spawn(self.flush())
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = self._spawn(self._flush_later())
+
+    def _spawn(self, coro) -> "asyncio.Task":
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Write all pending entries in one bulk upsert"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await self.collection.bulk_write(
+                [UpdateOne({"_id": key}, {"$set": doc}, upsert=True) for key, doc in pending.items()],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning("L2 cache flush of %d entries failed: %s", len(pending), e)
+
+    async def close(self):
+        """Stop the flush timer and write out everything still pending"""
+        if self._flush_timer is not None and not self._flush_timer.done():
+            self._flush_timer.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
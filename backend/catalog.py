@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from models import Movie, MovieDetail
+from tmdb_service import tmdb, popular_request, trending_request, genre_request
+from search_index import search_index, suggest_index, SEARCH_INDEX_ENABLED
+from tmdb_normalize import MovieRecord, item_fields, movie_from_fields
+
+logger = logging.getLogger(__name__)
+
+# Catalog mirror settings
+CATALOG_ENABLED = os.environ.get("CATALOG_MIRROR_ENABLED", "false").lower() == "true"
+CATALOG_REFRESH_INTERVAL = float(os.environ.get("CATALOG_REFRESH_INTERVAL", "3600"))
+CATALOG_MAX_AGE = timedelta(seconds=float(os.environ.get("CATALOG_MAX_AGE", "7200")))
+CATALOG_POPULAR_PAGES = int(os.environ.get("CATALOG_POPULAR_PAGES", "5"))
+CATALOG_GENRE_PAGES = int(os.environ.get("CATALOG_GENRE_PAGES", "2"))
+CATALOG_TRAILER_TTL = timedelta(seconds=float(os.environ.get("CATALOG_TRAILER_TTL", "86400")))
+
+# Fields stored for every title; detail-only fields are added by store_detail
+MOVIE_FIELDS = list(Movie.__fields__.keys())
+DETAIL_FIELDS = [f for f in MovieDetail.__fields__.keys() if f not in MOVIE_FIELDS]
+
+def doc_id(media_type: str, item_id: int) -> str:
+    """Catalog _id; movie and tv ids are separate TMDB namespaces"""
+    return f"{media_type}:{item_id}"
+
+class CatalogMirror:
+    """Local MongoDB copy of the TMDB lists the app serves.
+
+    A background job pages through popular, trending and discover-by-genre,
+    upserts the titles into the `movies` collection and records each list
+    page's order in `catalog_lists`. Read paths use these documents while
+    they are younger than CATALOG_MAX_AGE and fall back to TMDB otherwise.
+    """
+
+    def __init__(self):
+        self.db = None
+        self._task: Optional[asyncio.Task] = None
+        self.progress: Dict[str, Any] = {
+            "running": False,
+            "stage": None,
+            "pages_done": 0,
+            "pages_total": 0,
+            "items_upserted": 0,
+            "last_started": None,
+            "last_finished": None,
+            "last_error": None,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    async def startup(self, db):
+        """Start the periodic ingestion job (called from the app startup hook)"""
+        if not CATALOG_ENABLED:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run_forever())
+        logger.info("Catalog mirror enabled (refresh every %ss)", int(CATALOG_REFRESH_INTERVAL))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _load_search_index(self):
+        """Seed the local search and typeahead indexes from the mirrored catalog"""
+        count = 0
+        async for doc in self.db.movies.find({}, {field: 1 for field in MOVIE_FIELDS + ["popularity"]}):
+            record = MovieRecord.from_fields(doc)
+            search_index.add(record, doc.get("popularity", 0))
+            suggest_index.add(record.id, record.media_type, record.title, doc.get("popularity", 0))
+            count += 1
+        logger.info("Search indexes seeded with %d catalog titles", count)
+
+    async def _run_forever(self):
+        if SEARCH_INDEX_ENABLED:
+            try:
+                await self._load_search_index()
+            except Exception as e:
+                logger.warning("Seeding search index from catalog failed: %s", e)
+        while True:
+            try:
+                await self.ingest()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Catalog ingestion failed")
+                self.progress["last_error"] = str(e)
+                self.progress["running"] = False
+            await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+
+    # Ingestion
+
+    async def _list_sources(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """(list key, TMDB endpoint, params) for every mirrored list page"""
+        sources = [
+            (f"popular:{page}", *popular_request(page))
+            for page in range(1, CATALOG_POPULAR_PAGES + 1)
+        ]
+        for media_type in ("all", "movie", "tv"):
+            for time_window in ("day", "week"):
+                sources.append((f"trending:{media_type}:{time_window}", *trending_request(media_type, time_window)))
+
+        genres = await tmdb.get_page("/genre/movie/list")
+        for genre in genres.get("genres", []):
+            for page in range(1, CATALOG_GENRE_PAGES + 1):
+                sources.append((f"genre:{genre['id']}:{page}", *genre_request(genre["id"], page)))
+        return sources
+
+    async def ingest(self):
+        """Mirror every list page not refreshed within the refresh interval"""
+        progress = self.progress
+        progress.update(running=True, stage="listing", pages_done=0, items_upserted=0,
+                        last_started=datetime.utcnow(), last_error=None)
+
+        sources = await self._list_sources()
+        fresh_after = datetime.utcnow() - timedelta(seconds=CATALOG_REFRESH_INTERVAL)
+        fresh = {
+            doc["_id"] async for doc in self.db.catalog_lists.find(
+                {"refreshed_at": {"$gte": fresh_after}}, {"_id": 1}
+            )
+        }
+        sources = [source for source in sources if source[0] not in fresh]
+        progress["pages_total"] = len(sources)
+
+        for list_key, endpoint, params in sources:
+            progress["stage"] = list_key
+            try:
+                data = await tmdb.get_page(endpoint, params)
+            except Exception as e:
+                logger.warning("Catalog page %s skipped: %s", list_key, e)
+                continue
+
+            default_type = "movie" if not endpoint.startswith("/trending/") else None
+            items = [
+                item for item in data.get("results", [])
+                if (item.get("media_type") or default_type) in ("movie", "tv")
+            ]
+            ids = await self._upsert_items(items, default_type)
+            # Publish the page only once its titles have trailers
+            await self._refresh_trailers(ids)
+            await self.db.catalog_lists.update_one(
+                {"_id": list_key},
+                {"$set": {"ids": ids, "refreshed_at": datetime.utcnow()}},
+                upsert=True
+            )
+            progress["pages_done"] += 1
+            progress["items_upserted"] += len(ids)
+            if progress["pages_done"] % 10 == 0 or progress["pages_done"] == progress["pages_total"]:
+                logger.info("Catalog ingest: %d/%d pages, %d items",
+                            progress["pages_done"], progress["pages_total"], progress["items_upserted"])
+
+        # Retry lookups that failed during the pass and re-check old ones
+        progress["stage"] = "trailers"
+        await self._refresh_trailers()
+        progress.update(running=False, stage=None, last_finished=datetime.utcnow())
+
+    def _item_doc(self, item: Dict[str, Any], media_type: str) -> Dict[str, Any]:
+        """Normalize a raw TMDB list item into stored Movie fields"""
+        doc = item_fields(item, media_type)
+        # Trailers are resolved separately by _refresh_trailers
+        del doc["trailer_url"]
+        doc.update(popularity=item.get("popularity", 0), updated_at=datetime.utcnow())
+        return doc
+
+    async def _upsert_items(self, items: List[Dict[str, Any]], default_type: Optional[str]) -> List[str]:
+        """Bulk-upsert list items, returning their catalog ids in list order"""
+        ops = []
+        ids = []
+        for item in items:
+            media_type = item.get("media_type") or default_type
+            _id = doc_id(media_type, item["id"])
+            ids.append(_id)
+            ops.append(UpdateOne({"_id": _id}, {"$set": self._item_doc(item, media_type)}, upsert=True))
+        if ops:
+            await self.db.movies.bulk_write(ops, ordered=False)
+        return ids
+
+    async def _refresh_trailers(self, ids: Optional[List[str]] = None):
+        """Resolve trailers for titles (of the given ids) never checked or checked too long ago"""
+        checked_before = datetime.utcnow() - CATALOG_TRAILER_TTL
+        query = {"$or": [{"trailer_checked_at": {"$exists": False}}, {"trailer_checked_at": {"$lt": checked_before}}]}
+        if ids is not None:
+            query["_id"] = {"$in": ids}
+        docs = await self.db.movies.find(query, {"id": 1, "media_type": 1}).to_list(None)
+        if not docs:
+            return
+
+        trailers = await tmdb.get_trailers([(doc["media_type"], doc["id"]) for doc in docs], return_exceptions=True)
+        now = datetime.utcnow()
+        # A failed lookup is not "checked, no trailer": leave it for the next pass
+        ops = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"trailer_url": trailer_url, "trailer_checked_at": now}})
+            for doc, trailer_url in zip(docs, trailers)
+            if not isinstance(trailer_url, Exception)
+        ]
+        if ops:
+            await self.db.movies.bulk_write(ops, ordered=False)
+
+    # Read paths
+
+    async def list_version(self, list_key: str) -> Optional[datetime]:
+        """When a mirrored list page get_list would serve was published, None if missing or too old"""
+        if not self.enabled:
+            return None
+        try:
+            page = await self.db.catalog_lists.find_one({"_id": list_key}, {"refreshed_at": 1})
+        except Exception as e:
+            logger.warning("Catalog read for %s failed: %s", list_key, e)
+            return None
+        if not page or page["refreshed_at"] < datetime.utcnow() - CATALOG_MAX_AGE:
+            return None
+        return page["refreshed_at"]
+
+    async def get_list(self, list_key: str, include_trailers: bool = True) -> Optional[List[Movie]]:
+        """Movies of a mirrored list page in TMDB order, or None if missing or too old"""
+        if not self.enabled:
+            return None
+        try:
+            page = await self.db.catalog_lists.find_one({"_id": list_key})
+            if not page or page["refreshed_at"] < datetime.utcnow() - CATALOG_MAX_AGE:
+                return None
+            docs = {doc["_id"]: doc async for doc in self.db.movies.find({"_id": {"$in": page["ids"]}})}
+        except Exception as e:
+            logger.warning("Catalog read for %s failed: %s", list_key, e)
+            return None
+
+        movies = []
+        unchecked = []
+        for _id in page["ids"]:
+            doc = docs.get(_id)
+            if doc is None:
+                continue
+            movie = movie_from_fields(doc)
+            if not include_trailers:
+                movie.trailer_url = None
+            elif "trailer_checked_at" not in doc:
+                unchecked.append(len(movies))
+            movies.append(movie)
+        
+        # Titles whose trailer lookup failed during ingestion are resolved live
+        if unchecked:
+            trailers = await tmdb.get_trailers([(movies[i].media_type, movies[i].id) for i in unchecked])
+            for i, trailer_url in zip(unchecked, trailers):
+                movies[i].trailer_url = trailer_url
+        return movies
+
+    async def detail_version(self, media_type: str, item_id: int) -> Optional[datetime]:
+        """When the stored detail get_detail would serve was written, None if missing or too old"""
+        if not self.enabled:
+            return None
+        try:
+            doc = await self.db.movies.find_one(
+                {"_id": doc_id(media_type, item_id), "has_details": True}, {"details_updated_at": 1}
+            )
+        except Exception as e:
+            logger.warning("Catalog detail read for %s:%s failed: %s", media_type, item_id, e)
+            return None
+        if not doc or doc["details_updated_at"] < datetime.utcnow() - CATALOG_MAX_AGE:
+            return None
+        return doc["details_updated_at"]
+
+    async def get_detail(self, media_type: str, item_id: int) -> Optional[MovieDetail]:
+        """Stored detail for a title, or None if not mirrored with details or too old"""
+        if not self.enabled:
+            return None
+        try:
+            doc = await self.db.movies.find_one({"_id": doc_id(media_type, item_id), "has_details": True})
+        except Exception as e:
+            logger.warning("Catalog detail read for %s:%s failed: %s", media_type, item_id, e)
+            return None
+        if not doc or doc["details_updated_at"] < datetime.utcnow() - CATALOG_MAX_AGE:
+            return None
+        return MovieDetail(**{field: doc.get(field) for field in MOVIE_FIELDS + DETAIL_FIELDS if field in doc})
+
+    async def store_detail(self, movie: MovieDetail):
+        """Write a detail fetched from TMDB through to the catalog"""
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        fields = movie.dict()
+        fields.update(has_details=True, details_updated_at=now, trailer_checked_at=now)
+        try:
+            await self.db.movies.update_one(
+                {"_id": doc_id(movie.media_type or "movie", movie.id)},
+                {"$set": fields},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("Catalog detail write for %s failed: %s", movie.id, e)
+
+# Process-wide mirror instance
+catalog = CatalogMirror()
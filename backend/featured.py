@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from models import Movie
+from tmdb_service import tmdb
+
+logger = logging.getLogger(__name__)
+
+# Hero banner settings
+FEATURED_CANDIDATES = int(os.environ.get("FEATURED_CANDIDATES", "5"))
+FEATURED_REFRESH_INTERVAL = float(os.environ.get("FEATURED_REFRESH_INTERVAL", "900"))
+FEATURED_ROTATION_INTERVAL = float(os.environ.get("FEATURED_ROTATION_INTERVAL", "300"))
+
+class FeaturedRotation:
+    """Precomputed hero banner candidates, rotated on a fixed cadence.
+
+    A background job picks the top trending movies of the week that have a
+    trailer (falling back to popular). Serving is a memory read; the slot is
+    derived from wall-clock time so every worker shows the same movie.
+    """
+
+    def __init__(self):
+        self.candidates: List[Movie] = []
+        self.refreshed_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def start(self):
+        """Start the periodic refresh (called from the app startup hook)"""
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run_forever(self):
+        # The first refresh comes from warmup or the first request
+        while True:
+            await asyncio.sleep(FEATURED_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Featured refresh failed, keeping previous candidates: %s", e)
+
+    async def _pick(self, movies: List[Movie]) -> List[Movie]:
+        """Top candidates with a trailer, resolving trailers only for those"""
+        top = movies[:FEATURED_CANDIDATES]
+        trailers = await tmdb.get_trailers([(movie.media_type or "movie", movie.id) for movie in top])
+        return [
+            movie.copy(update={"trailer_url": trailer_url})
+            for movie, trailer_url in zip(top, trailers) if trailer_url
+        ]
+
+    async def refresh(self, force: bool = True):
+        """Recompute the candidate list; without force, only if it is still empty"""
+        async with self._lock:
+            # Another caller may have filled it while we waited for the lock
+            if not force and self.candidates:
+                return
+            candidates = await self._pick(await tmdb.get_trending_content("movie", "week", include_trailers=False))
+            if not candidates:
+                candidates = await self._pick(await tmdb.get_popular_movies(1, include_trailers=False))
+            if candidates:
+                self.candidates = candidates
+                self.refreshed_at = datetime.utcnow()
+
+    @staticmethod
+    def _slot() -> int:
+        return int(time.time() // FEATURED_ROTATION_INTERVAL)
+
+    def current(self) -> Optional[Movie]:
+        """Movie for the current rotation slot"""
+        if not self.candidates:
+            return None
+        return self.candidates[self._slot() % len(self.candidates)]
+
+    def version(self) -> Optional[Tuple[datetime, int]]:
+        """Identity of what current() returns (candidate list and slot), None before the first refresh"""
+        if not self.candidates:
+            return None
+        return self.refreshed_at, self._slot() % len(self.candidates)
+
+    async def get(self) -> Optional[Movie]:
+        """Current featured movie, computing candidates on first use"""
+        if not self.candidates:
+            await self.refresh(force=False)
+        return self.current()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "candidates": [movie.id for movie in self.candidates],
+            "refreshed_at": self.refreshed_at,
+        }
+
+# Process-wide hero banner state
+featured = FeaturedRotation()
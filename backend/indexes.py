@@ -0,0 +1,102 @@
+from pymongo import ASCENDING, IndexModel
+from typing import Dict, List
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# "create" builds missing indexes, "strict" only verifies them and fails
+# startup when one is missing, "off" skips the check entirely
+INDEX_MODE = os.environ.get("DB_INDEX_MODE", "create").lower()
+
+# Indexes the API relies on, per collection
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # Login/registration lookups and the "already registered" guarantee
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "movies": [
+        # Trailer re-checks by the ingestion job
+        IndexModel([("trailer_checked_at", ASCENDING)], name="trailer_checked_at"),
+    ],
+    "catalog_lists": [
+        # Incremental refresh picks pages older than the refresh interval
+        IndexModel([("refreshed_at", ASCENDING)], name="refreshed_at"),
+    ],
+}
+
+# Options that make two indexes on the same keys different indexes
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+class MissingIndexError(RuntimeError):
+    pass
+
+def _key_pattern(key) -> List:
+    return [(field, direction) for field, direction in (key.items() if hasattr(key, "items") else key)]
+
+# Boolean options that are the same as not setting them when False
+FLAG_OPTIONS = ("unique", "sparse")
+
+def _options(spec: dict) -> Dict:
+    """Options set on an index spec; a TTL of 0 is set, unique=False is not"""
+    return {
+        option: spec[option] for option in INDEX_OPTIONS
+        if spec.get(option) is not None and not (option in FLAG_OPTIONS and spec[option] is False)
+    }
+
+def find_index(existing: Dict[str, dict], model: IndexModel):
+    """(name, same_options) of the existing index on the model's keys, whatever its name, or None"""
+    wanted = model.document
+    for name, spec in existing.items():
+        if _key_pattern(spec["key"]) == _key_pattern(wanted["key"]):
+            return name, _options(spec) == _options(wanted)
+    return None
+
+async def ensure_indexes(db, mode: str = INDEX_MODE):
+    """Create or verify every required index (idempotent)"""
+    if mode == "off":
+        logger.info("Index management disabled")
+        return
+
+    total = sum(len(models) for models in REQUIRED_INDEXES.values())
+    done = 0
+    missing = []
+
+    for collection_name, models in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+
+        for model in models:
+            done += 1
+            name = model.document["name"]
+            found = find_index(existing, model)
+            if found is not None:
+                existing_name, same_options = found
+                if same_options:
+                    logger.info("Index %s.%s present as %s (%d/%d)", collection_name, name, existing_name, done, total)
+                    continue
+                # Same keys with other options can't be created alongside; it needs a manual migration
+                if mode == "strict":
+                    missing.append(f"{collection_name}.{name} (differs from {existing_name})")
+                else:
+                    logger.error(
+                        "Index %s.%s exists as %s with different options, drop it to let it be rebuilt (%d/%d)",
+                        collection_name, name, existing_name, done, total
+                    )
+                continue
+
+            if mode == "strict":
+                missing.append(f"{collection_name}.{name}")
+                continue
+
+            started = time.monotonic()
+            logger.info("Building index %s.%s (%d/%d)...", collection_name, name, done, total)
+            await collection.create_indexes([model])
+            logger.info(
+                "Built index %s.%s in %.1fs (%d/%d)",
+                collection_name, name, time.monotonic() - started, done, total
+            )
+
+    if missing:
+        raise MissingIndexError(f"Required indexes missing: {', '.join(missing)}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from bson import ObjectId
 
@@ -98,6 +98,33 @@ class AuthResponse(BaseModel):
 class MessageResponse(BaseModel):
     message: str
 
+class Suggestion(BaseModel):
+    id: int
+    title: str
+    media_type: str
+
+class TrailersResponse(BaseModel):
+    trailers: Dict[int, Optional[str]]
+
 class WatchlistResponse(BaseModel):
     watchlist: List[Movie]
-    count: int
\ No newline at end of file
+    count: int
+    partial: bool = False  # True when some items could not be loaded before the deadline
+
+class WatchlistBulkUpdate(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
+class WatchlistBulkResponse(BaseModel):
+    watchlist: List[int]
+    not_found: List[int] = []
+
+class HomeRow(BaseModel):
+    key: str
+    title: str
+    movies: List[Movie]
+
+class HomeFeed(BaseModel):
+    featured: Optional[Movie] = None
+    genres: List[Genre] = []
+    rows: List[HomeRow]
@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from fastapi import Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from cache import TTLCache
+from tmdb_service import served_stale
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+# Encoded response cache settings
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+# Default response class for the app: orjson when installed
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+def encode_json(content: Any) -> bytes:
+    """Serialize models/dicts/lists to JSON bytes with the fastest available encoder"""
+    if orjson is not None:
+        return orjson.dumps(jsonable_encoder(content))
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+def etag_for(data: bytes) -> str:
+    """Strong ETag for a response body (or any bytes identifying its content)"""
+    return '"%s"' % hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists etag (weak comparison, as RFC 9110 asks for)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def cache_headers(etag: str, cache_control: str, vary: Optional[str] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+def not_modified(etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control, vary))
+
+def conditional_bytes(request: Request, body: bytes, etag: str, cache_control: str, vary: Optional[str] = None) -> Response:
+    """304 when the client already has this body, else the body with validators"""
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, vary)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag, cache_control, vary))
+
+def conditional_json(request: Request, content: Any, cache_control: str, vary: Optional[str] = None) -> Response:
+    """Encode content and answer it conditionally"""
+    body = encode_json(content)
+    return conditional_bytes(request, body, etag_for(body), cache_control, vary)
+
+class ResponseCache:
+    """Final JSON bytes of hot endpoints, keyed by (endpoint, params).
+
+    Each body is stored with the version of the data it was built from (the
+    TMDB cache entry or catalog page behind it) and only served to callers
+    that still see that version, so a reload retires just the bodies built
+    from it. Entries also expire after RESPONSE_CACHE_TTL as a safety net
+    for data that changes without a new version (e.g. resolved trailers).
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        self.ttl = ttl
+        self.outdated = 0
+        self.bodies = TTLCache(max_entries=max_entries)
+
+    def key(self, endpoint: str, **params) -> str:
+        args = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{endpoint}?{args}"
+
+    def get(self, key: str, version: Optional[Hashable]) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) for key if it was built from this data version"""
+        if not RESPONSE_CACHE_ENABLED or version is None:
+            return None
+        entry = self.bodies.get(key)
+        if entry is None or not entry.is_fresh():
+            return None
+        stored_version, body, etag = entry.value
+        if stored_version != version:
+            self.outdated += 1
+            return None
+        return body, etag
+
+    def set(self, key: str, version: Hashable, body: bytes, etag: str):
+        if RESPONSE_CACHE_ENABLED:
+            self.bodies.set(key, (version, body, etag), self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"encoder": "orjson" if orjson is not None else "json", "outdated": self.outdated, **self.bodies.stats()}
+
+# Process-wide encoded response cache
+response_cache = ResponseCache()
+
+async def cached_body(key: str, version: Callable[[], Awaitable[Optional[Hashable]]], load: Callable[[], Awaitable[Any]]) -> Tuple[bytes, str]:
+    """(body, etag) for key, loading and encoding the content only on a miss.
+
+    version() identifies the data the content is built from (None when not
+    known yet). It is read before and after loading, and a body is only
+    cached under a version it was built from, never from a stale fallback.
+    """
+    loaded_from = await version()
+    cached = response_cache.get(key, loaded_from)
+    if cached is None:
+        body = encode_json(await load())
+        cached = (body, etag_for(body))
+        current = await version()
+        if current is not None and loaded_from in (None, current) and not served_stale():
+            response_cache.set(key, current, *cached)
+    return cached
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 from typing import List
 from models import (
@@ -9,9 +10,10 @@ from models import (
     AuthResponse, MessageResponse
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token, 
+    get_password_hash_async, verify_password_async, create_access_token, 
     get_current_user_id
 )
+from cache import TTLCache
 import os
 from pathlib import Path
 
@@ -23,18 +25,38 @@ from server import db
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
 
+# Short-lived cache of authenticated user records (without password_hash)
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", "10000"))
+user_cache = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES)
+
+def invalidate_user_cache(user_id):
+    """Drop a cached user record after the user document changed.
+
+    Only this process's copy is dropped; other workers keep theirs for up to
+    USER_CACHE_TTL, so routes that return user data read it from MongoDB and
+    the cache is only trusted for authentication.
+    """
+    user_cache.delete(str(user_id))
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get current authenticated user"""
     user_id = get_current_user_id(credentials.credentials)
     
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    entry = user_cache.get(user_id)
+    if entry is not None and entry.is_fresh():
+        return dict(entry.value)
+    
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"password_hash": 0})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return user
+    if USER_CACHE_TTL > 0:
+        user_cache.set(user_id, user, USER_CACHE_TTL)
+    return dict(user)
 
 @router.post("/register", response_model=AuthResponse)
 async def register_user(user_data: UserCreate):
@@ -48,7 +70,7 @@ async def register_user(user_data: UserCreate):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user_doc = {
         "name": user_data.name,
         "email": user_data.email,
@@ -59,7 +81,14 @@ async def register_user(user_data: UserCreate):
         "updated_at": datetime.utcnow()
     }
     
-    result = await db.users.insert_one(user_doc)
+    try:
+        result = await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     user_doc["_id"] = result.inserted_id
     
     # Create access token
@@ -92,7 +121,7 @@ async def login_user(login_data: UserLogin):
         )
     
     # Verify password
-    if not verify_password(login_data.password, user["password_hash"]):
+    if not await verify_password_async(login_data.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -119,13 +148,20 @@ async def login_user(login_data: UserLogin):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
     """Get current user profile"""
+    # Read fresh: the cached record may predate a write made on another worker
+    user = await db.users.find_one({"_id": current_user["_id"]}, {"password_hash": 0})
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     return UserResponse(
-        id=str(current_user["_id"]),
-        name=current_user["name"],
-        email=current_user["email"],
-        avatar=current_user.get("avatar"),
-        watchlist=current_user.get("watchlist", []),
-        created_at=current_user["created_at"]
+        id=str(user["_id"]),
+        name=user["name"],
+        email=user["email"],
+        avatar=user.get("avatar"),
+        watchlist=user.get("watchlist", []),
+        created_at=user["created_at"]
     )
 
 @router.put("/profile", response_model=UserResponse)
@@ -151,13 +187,20 @@ async def update_user_profile(
                     detail="Email already taken"
                 )
         
-        await db.users.update_one(
-            {"_id": current_user["_id"]},
-            {"$set": update_dict}
-        )
+        try:
+            await db.users.update_one(
+                {"_id": current_user["_id"]},
+                {"$set": update_dict}
+            )
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already taken"
+            )
+        invalidate_user_cache(current_user["_id"])
         
         # Get updated user
-        updated_user = await db.users.find_one({"_id": current_user["_id"]})
+        updated_user = await db.users.find_one({"_id": current_user["_id"]}, {"password_hash": 0})
         current_user.update(updated_user)
     
     return UserResponse(
@@ -1,16 +1,33 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
 from models import Genre
-from tmdb_service import TMDBService
+from tmdb_service import tmdb, served_stale
+from responses import response_cache, cached_body, conditional_bytes, conditional_json
 
 router = APIRouter(prefix="/genres", tags=["genres"])
-tmdb = TMDBService()
+
+# Genre names practically never change
+CACHE_CONTROL_GENRES = "public, max-age=86400"
+VARY = "Accept-Encoding"
 
 @router.get("/", response_model=List[Genre])
-async def get_genres():
+async def get_genres(request: Request):
     """Get all available genres"""
-    try:
+    async def version():
+        movie_version = tmdb.cache_version("/genre/movie/list")
+        tv_version = tmdb.cache_version("/genre/tv/list")
+        return (movie_version, tv_version) if movie_version and tv_version else None
+
+    async def load():
         genres = await tmdb.get_genres()
+        if not genres:
+            raise ValueError("TMDB returned no genres")
         return genres
-    except Exception as e:
-        return []  # Return empty list if genres can't be fetched
\ No newline at end of file
+
+    try:
+        body, etag = await cached_body(response_cache.key("genres"), version, load)
+    except Exception:
+        # Return empty list if genres can't be fetched; only the real list is worth keeping
+        return conditional_json(request, [], "no-cache", VARY)
+    cache_control = "no-cache" if served_stale() else CACHE_CONTROL_GENRES
+    return conditional_bytes(request, body, etag, cache_control, VARY)
@@ -0,0 +1,123 @@
+from fastapi import APIRouter, HTTPException
+from typing import List, Tuple
+import asyncio
+import logging
+import os
+from models import Movie, HomeRow, HomeFeed
+from tmdb_service import tmdb
+from catalog import catalog
+from featured import featured
+from cache import TTLCache, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/home", tags=["home"])
+
+# Rows of the browse page as catalog list keys (popular, trending:<media_type>:<time_window>, genre:<id>)
+HOME_ROWS = [row.strip() for row in os.environ.get("HOME_ROWS", "popular,trending:all:week,genre:28").split(",") if row.strip()]
+HOME_ROW_LIMIT = int(os.environ.get("HOME_ROW_LIMIT", "20"))
+HOME_CACHE_TTL = float(os.environ.get("HOME_CACHE_TTL", "60"))
+
+ROW_TITLES = {
+    "popular": "Popular on Netflix",
+    "trending": "Trending Now",
+}
+
+home_cache = TTLCache(max_entries=1)
+_composing = SingleFlight()
+
+async def load_row(row: str) -> Tuple[List[Movie], bool]:
+    """Page 1 of a home row, and whether its trailers are resolved (catalog rows come with them)"""
+    parts = row.split(":")
+    if parts[0] == "popular":
+        list_key, fetch = "popular:1", lambda: tmdb.get_popular_movies(1, include_trailers=False)
+    elif parts[0] == "trending" and len(parts) == 3:
+        list_key = f"trending:{parts[1]}:{parts[2]}"
+        fetch = lambda: tmdb.get_trending_content(parts[1], parts[2], include_trailers=False)
+    elif parts[0] == "genre" and len(parts) == 2:
+        list_key = f"genre:{parts[1]}:1"
+        fetch = lambda: tmdb.get_movies_by_genre(int(parts[1]), 1, include_trailers=False)
+    else:
+        raise ValueError(f"Unknown home row {row!r}")
+    
+    movies = await catalog.get_list(list_key, include_trailers=True)
+    if movies is not None:
+        return movies[:HOME_ROW_LIMIT], True
+    movies = await fetch()
+    return movies[:HOME_ROW_LIMIT], False
+
+def row_title(row: str, genre_names: dict) -> str:
+    kind, _, rest = row.partition(":")
+    if kind == "genre":
+        return f"{genre_names.get(int(rest), 'More')} Movies"
+    return ROW_TITLES.get(kind, row)
+
+async def compose_home() -> HomeFeed:
+    """Fetch every row concurrently and resolve each distinct trailer once"""
+    results = await asyncio.gather(
+        featured.get(),
+        tmdb.get_genres(),
+        *(load_row(row) for row in HOME_ROWS),
+        return_exceptions=True
+    )
+    hero, genres, row_results = results[0], results[1], results[2:]
+    if isinstance(hero, Exception):
+        logger.warning("Home feed without hero: %s", hero)
+        hero = None
+    if isinstance(genres, Exception):
+        logger.warning("Home feed without genres: %s", genres)
+        genres = []
+    
+    rows: List[Tuple[str, List[Movie]]] = []
+    trailers = {}
+    for row, result in zip(HOME_ROWS, row_results):
+        if isinstance(result, Exception):
+            logger.warning("Home row %s skipped: %s", row, result)
+            continue
+        movies, resolved = result
+        rows.append((row, movies))
+        if resolved:
+            trailers.update(((movie.media_type or "movie", movie.id), movie.trailer_url) for movie in movies)
+    if not rows and hero is None:
+        raise HTTPException(status_code=503, detail="Home feed unavailable")
+    
+    # Rows overlap heavily (trending vs popular), so look every remaining title up once
+    items = list(dict.fromkeys(
+        (movie.media_type or "movie", movie.id) for _, movies in rows for movie in movies
+    ))
+    items = [item for item in items if item not in trailers]
+    if items:
+        trailers.update(zip(items, await tmdb.get_trailers(items)))
+    
+    genre_names = {genre.id: genre.name for genre in genres}
+    return HomeFeed(
+        featured=hero,
+        genres=genres,
+        rows=[
+            HomeRow(
+                key=row,
+                title=row_title(row, genre_names),
+                movies=[
+                    movie.copy(update={"trailer_url": trailers.get((movie.media_type or "movie", movie.id))})
+                    for movie in movies
+                ]
+            )
+            for row, movies in rows
+        ]
+    )
+
+async def get_home_feed() -> HomeFeed:
+    entry = home_cache.get("home")
+    if entry is not None and entry.is_fresh():
+        return entry.value
+    
+    async def load():
+        feed = await compose_home()
+        home_cache.set("home", feed, HOME_CACHE_TTL)
+        return feed
+    return await _composing.do("home", load)
+
+@router.get("", response_model=HomeFeed)
+async def get_home():
+    """Everything the browse page shows (hero, genres and movie rows) in one response"""
+    return await get_home_feed()
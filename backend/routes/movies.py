@@ -1,77 +1,240 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
-from models import Movie, MovieDetail, SearchResult, Genre
-from tmdb_service import TMDBService
+from models import Movie, MovieDetail, SearchResult, Genre, TrailersResponse, Suggestion
+from tmdb_service import (
+    tmdb, served_stale, popular_request, trending_request, genre_request,
+    search_request, details_request, videos_request
+)
+from catalog import catalog
+from featured import featured
+from search_index import search_index, suggest_index
 from routes.auth import get_current_user
+from responses import response_cache, cached_body, conditional_bytes
 
 router = APIRouter(prefix="/movies", tags=["movies"])
-tmdb = TMDBService()
+
+MAX_TRAILER_BATCH = 50
+
+# HTTP caching per kind of payload (shared caches and CDNs may store all of them)
+CACHE_CONTROL_LISTS = "public, max-age=60"
+CACHE_CONTROL_DETAILS = "public, max-age=3600"
+CACHE_CONTROL_SEARCH = "public, max-age=300"
+CACHE_CONTROL_STALE = "no-cache"
+VARY = "Accept-Encoding"
+
+def cache_control(default: str) -> str:
+    """Don't let clients keep a stale fallback around"""
+    return CACHE_CONTROL_STALE if served_stale() else default
+
+async def list_version(list_key: str, endpoint: str, params: dict):
+    """Version of the data behind a list: its catalog page if mirrored, else its TMDB payload"""
+    return await catalog.list_version(list_key) or tmdb.cache_version(endpoint, params)
+
+def tmdb_versions(requests):
+    """Versions of several cached TMDB payloads, None unless all of them are cached"""
+    versions = tuple(tmdb.cache_version(endpoint, params) for endpoint, params in requests)
+    return None if None in versions else versions
+
+async def cached_json(request: Request, key: str, version, load, default_cache_control: str):
+    """Serve pre-encoded JSON bytes, building and caching them only on a miss"""
+    body, etag = await cached_body(key, version, load)
+    return conditional_bytes(request, body, etag, cache_control(default_cache_control), VARY)
 
 @router.get("/featured", response_model=Movie)
-async def get_featured_movie():
+async def get_featured_movie(request: Request):
     """Get featured movie for hero section"""
-    movie = await tmdb.get_featured_movie()
-    if not movie:
-        raise HTTPException(status_code=404, detail="No featured movie found")
-    return movie
+    async def version():
+        return featured.version()
+    
+    async def load():
+        movie = await featured.get()
+        if not movie:
+            raise HTTPException(status_code=404, detail="No featured movie found")
+        return movie
+    
+    return await cached_json(request, response_cache.key("featured"), version, load, CACHE_CONTROL_LISTS)
 
 @router.get("/popular", response_model=List[Movie])
-async def get_popular_movies(page: int = Query(1, ge=1, le=500)):
+async def get_popular_movies(
+    request: Request,
+    page: int = Query(1, ge=1, le=500),
+    include_trailers: bool = Query(True)
+):
     """Get popular movies"""
-    try:
-        movies = await tmdb.get_popular_movies(page)
+    list_key = f"popular:{page}"
+    
+    async def version():
+        return await list_version(list_key, *popular_request(page))
+    
+    async def load():
+        movies = await catalog.get_list(list_key, include_trailers)
+        if movies is None:
+            movies = await tmdb.get_popular_movies(page, include_trailers)
         return movies
+    
+    try:
+        key = response_cache.key("popular", page=page, include_trailers=include_trailers)
+        return await cached_json(request, key, version, load, CACHE_CONTROL_LISTS)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail=str(e))
 
 @router.get("/trending", response_model=List[Movie])
 async def get_trending_content(
+    request: Request,
     media_type: str = Query("all", regex="^(all|movie|tv)$"),
-    time_window: str = Query("day", regex="^(day|week)$")
+    time_window: str = Query("day", regex="^(day|week)$"),
+    include_trailers: bool = Query(True)
 ):
     """Get trending movies and TV shows"""
-    try:
-        content = await tmdb.get_trending_content(media_type, time_window)
+    list_key = f"trending:{media_type}:{time_window}"
+    
+    async def version():
+        return await list_version(list_key, *trending_request(media_type, time_window))
+    
+    async def load():
+        content = await catalog.get_list(list_key, include_trailers)
+        if content is None:
+            content = await tmdb.get_trending_content(media_type, time_window, include_trailers)
         return content
+    
+    try:
+        key = response_cache.key("trending", media_type=media_type, time_window=time_window, include_trailers=include_trailers)
+        return await cached_json(request, key, version, load, CACHE_CONTROL_LISTS)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail=str(e))
 
 @router.get("/genre/{genre_id}", response_model=List[Movie])
 async def get_movies_by_genre(
+    request: Request,
     genre_id: int,
-    page: int = Query(1, ge=1, le=500)
+    page: int = Query(1, ge=1, le=500),
+    include_trailers: bool = Query(True)
 ):
     """Get movies by genre"""
-    try:
-        movies = await tmdb.get_movies_by_genre(genre_id, page)
+    list_key = f"genre:{genre_id}:{page}"
+    
+    async def version():
+        return await list_version(list_key, *genre_request(genre_id, page))
+    
+    async def load():
+        movies = await catalog.get_list(list_key, include_trailers)
+        if movies is None:
+            movies = await tmdb.get_movies_by_genre(genre_id, page, include_trailers)
         return movies
+    
+    try:
+        key = response_cache.key("genre", genre_id=genre_id, page=page, include_trailers=include_trailers)
+        return await cached_json(request, key, version, load, CACHE_CONTROL_LISTS)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail=str(e))
 
 @router.get("/search", response_model=List[Movie])
 async def search_content(
+    request: Request,
     q: str = Query(..., min_length=1),
-    page: int = Query(1, ge=1, le=500)
+    page: int = Query(1, ge=1, le=500),
+    include_trailers: bool = Query(True)
 ):
     """Search movies and TV shows"""
-    try:
-        results = await tmdb.search_content(q, page)
+    async def version():
+        # Local index contents, and the TMDB page if the query was left to TMDB
+        return search_index.generation, tmdb.cache_version(*search_request(q, page))
+    
+    async def load():
+        # Answer from the local index, TMDB only on a miss
+        results = search_index.search(q, page)
+        if results is None:
+            results = await tmdb.search_content(q, page, include_trailers)
+        elif include_trailers:
+            trailers = await tmdb.get_trailers([(movie.media_type, movie.id) for movie in results])
+            results = [movie.copy(update={"trailer_url": trailer_url}) for movie, trailer_url in zip(results, trailers)]
         return results
+    
+    try:
+        key = response_cache.key("search", q=q, page=page, include_trailers=include_trailers)
+        return await cached_json(request, key, version, load, CACHE_CONTROL_SEARCH)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=503, detail=str(e))
 
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest_titles(
+    request: Request,
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=10)
+):
+    """Typeahead suggestions for titles starting with prefix"""
+    async def version():
+        return suggest_index.generation
+    
+    async def load():
+        return suggest_index.suggest(prefix, limit)
+    
+    return await cached_json(request, response_cache.key("suggest", prefix=prefix, limit=limit), version, load, CACHE_CONTROL_SEARCH)
+
+@router.get("/trailers", response_model=TrailersResponse)
+async def get_trailers(
+    request: Request,
+    ids: str = Query(..., min_length=1, description="Comma-separated TMDB ids"),
+    media_type: str = Query("movie", regex="^(movie|tv)$")
+):
+    """Resolve trailer URLs for many movies or TV shows in one request"""
+    try:
+        item_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(item_ids) > MAX_TRAILER_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TRAILER_BATCH} ids per request")
+    
+    items = [(media_type, item_id) for item_id in item_ids]
+    
+    async def version():
+        return tmdb_versions(videos_request(*item) for item in items)
+    
+    async def load():
+        trailers = await tmdb.get_trailers(items)
+        return TrailersResponse(trailers=dict(zip(item_ids, trailers)))
+    
+    key = response_cache.key("trailers", ids=",".join(map(str, item_ids)), media_type=media_type)
+    return await cached_json(request, key, version, load, CACHE_CONTROL_DETAILS)
+
 @router.get("/{movie_id}", response_model=MovieDetail)
-async def get_movie_details(movie_id: int):
+async def get_movie_details(request: Request, movie_id: int):
     """Get detailed movie information"""
-    movie = await tmdb.get_movie_details(movie_id)
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    return movie
+    async def version():
+        return await catalog.detail_version("movie", movie_id) or tmdb.cache_version(*details_request("movie", movie_id))
+    
+    async def load():
+        movie = await catalog.get_detail("movie", movie_id)
+        if not movie:
+            movie = await tmdb.get_movie_details(movie_id)
+            if not movie:
+                raise HTTPException(status_code=404, detail="Movie not found")
+            await catalog.store_detail(movie)
+        return movie
+    
+    return await cached_json(request, response_cache.key("details", movie_id=movie_id), version, load, CACHE_CONTROL_DETAILS)
 
 @router.get("/{movie_id}/trailer", response_model=dict)
-async def get_movie_trailer(movie_id: int):
+async def get_movie_trailer(request: Request, movie_id: int):
     """Get movie trailer URL"""
-    trailer_url = await tmdb.get_movie_trailer(movie_id)
-    if not trailer_url:
-        raise HTTPException(status_code=404, detail="Trailer not found")
-    return {"trailer_url": trailer_url}
\ No newline at end of file
+    async def version():
+        return tmdb.cache_version(*videos_request("movie", movie_id))
+    
+    async def load():
+        trailer_url = await tmdb.get_movie_trailer(movie_id)
+        if not trailer_url:
+            raise HTTPException(status_code=404, detail="Trailer not found")
+        return {"trailer_url": trailer_url}
+    
+    return await cached_json(request, response_cache.key("trailer", movie_id=movie_id), version, load, CACHE_CONTROL_DETAILS)
\ No newline at end of file
@@ -1,49 +1,216 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from typing import List, Optional, Tuple
 from bson import ObjectId
-from models import Movie, WatchlistResponse, MessageResponse
-from routes.auth import get_current_user
-from tmdb_service import TMDBService
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from models import (
+    Movie, MovieDetail, WatchlistResponse, MessageResponse,
+    WatchlistBulkUpdate, WatchlistBulkResponse
+)
+from routes.auth import get_current_user, invalidate_user_cache
+from tmdb_service import tmdb
+from tmdb_normalize import movie_from_fields
+from responses import etag_for, etag_matches, not_modified
+import asyncio
+import logging
+import os
 import sys
 sys.path.append('/app/backend')
 from server import db
 
 router = APIRouter(prefix="/watchlist", tags=["watchlist"])
-tmdb = TMDBService()
+logger = logging.getLogger(__name__)
+
+# Watchlist hydration limits
+HYDRATION_CONCURRENCY = int(os.environ.get("WATCHLIST_HYDRATION_CONCURRENCY", "10"))
+HYDRATION_DEADLINE = float(os.environ.get("WATCHLIST_HYDRATION_DEADLINE", "5"))
+
+# Most movies a single bulk update may touch
+MAX_BULK_ITEMS = 100
+
+# Snapshots older than this are re-validated against TMDB in the background
+SNAPSHOT_MAX_AGE = timedelta(seconds=float(os.environ.get("WATCHLIST_SNAPSHOT_MAX_AGE", "86400")))
+
+# Per-user responses, revalidated with the ETag on every use
+CACHE_CONTROL_WATCHLIST = "private, no-cache"
+VARY_WATCHLIST = "Authorization"
+
+# Background snapshot refreshes (kept referenced until they finish)
+_refresh_tasks = set()
+_refreshing_ids = set()
+
+def to_movie(movie: MovieDetail) -> Movie:
+    """Convert MovieDetail to the Movie fields used in watchlist responses"""
+    return movie_from_fields(movie.__dict__)
+
+async def save_snapshots(movies: List[Movie]):
+    """Upsert compact Movie snapshots, one document per TMDB id"""
+    if not movies:
+        return
+    now = datetime.utcnow()
+    await db.watchlist_snapshots.bulk_write([
+        UpdateOne(
+            {"_id": movie.id},
+            {"$set": {**movie.dict(exclude={"id"}), "refreshed_at": now}},
+            upsert=True
+        )
+        for movie in movies
+    ], ordered=False)
+
+def watchlist_etag(watchlist_ids: List[int], snapshots: dict) -> str:
+    """ETag from the data version: the ids in order and when each snapshot was refreshed"""
+    version = ",".join(f"{movie_id}@{snapshots[movie_id]['refreshed_at'].isoformat()}" for movie_id in watchlist_ids)
+    return etag_for(version.encode())
+
+def snapshot_to_movie(doc: dict) -> Movie:
+    """Build a Movie from a stored snapshot document"""
+    return movie_from_fields({**doc, "id": doc["_id"]})
+
+async def hydrate_watchlist(watchlist_ids: List[int], deadline: Optional[float] = HYDRATION_DEADLINE) -> Tuple[List[Movie], bool]:
+    """Load movie details concurrently, returning (movies, partial) once done or past the deadline (None waits for all)"""
+    if not watchlist_ids:
+        return [], False
+    
+    semaphore = asyncio.Semaphore(HYDRATION_CONCURRENCY)
+    
+    async def fetch(movie_id: int):
+        async with semaphore:
+            return await tmdb.get_movie_details(movie_id)
+    
+    tasks = [asyncio.ensure_future(fetch(movie_id)) for movie_id in watchlist_ids]
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    
+    movies = []
+    # Keep watchlist order, skipping movies that can't be fetched
+    for task in tasks:
+        if task in pending or task.exception() is not None:
+            continue
+        movie = task.result()
+        if movie:
+            movies.append(to_movie(movie))
+    
+    return movies, bool(pending)
+
+async def refresh_snapshots(movie_ids: List[int]):
+    """Re-validate snapshots against TMDB"""
+    try:
+        movies, _ = await hydrate_watchlist(movie_ids)
+        await save_snapshots(movies)
+    except Exception as e:
+        logger.warning("Watchlist snapshot refresh failed: %s", e)
+    finally:
+        _refreshing_ids.difference_update(movie_ids)
+
+def schedule_snapshot_refresh(movie_ids: List[int]):
+    """Refresh stale snapshots in the background, once per id at a time"""
+    movie_ids = [movie_id for movie_id in movie_ids if movie_id not in _refreshing_ids]
+    if not movie_ids:
+        return
+    _refreshing_ids.update(movie_ids)
+    task = asyncio.create_task(refresh_snapshots(movie_ids))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
 
 @router.get("/", response_model=WatchlistResponse)
-async def get_user_watchlist(current_user: dict = Depends(get_current_user)):
+async def get_user_watchlist(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
     """Get user's watchlist with movie details"""
-    watchlist_ids = current_user.get("watchlist", [])
-    movies = []
+    # The user cache is per process and a write may have landed on another
+    # worker, so the ids always come from MongoDB
+    user = await db.users.find_one({"_id": current_user["_id"]}, {"watchlist": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    watchlist_ids = user.get("watchlist", [])
+    snapshots = {}
+    if watchlist_ids:
+        # Serve from stored snapshots
+        async for doc in db.watchlist_snapshots.find({"_id": {"$in": watchlist_ids}}):
+            snapshots[doc["_id"]] = doc
+        
+        stale_before = datetime.utcnow() - SNAPSHOT_MAX_AGE
+        stale_ids = [movie_id for movie_id, doc in snapshots.items() if doc["refreshed_at"] < stale_before]
+        if stale_ids:
+            schedule_snapshot_refresh(stale_ids)
     
-    # Get movie details for each ID in watchlist
-    for movie_id in watchlist_ids:
+    # Items without a snapshot yet are loaded from TMDB and stored
+    partial = False
+    missing_ids = [movie_id for movie_id in watchlist_ids if movie_id not in snapshots]
+    response.headers["Cache-Control"] = CACHE_CONTROL_WATCHLIST
+    response.headers["Vary"] = VARY_WATCHLIST
+    if not missing_ids:
+        # Fully snapshotted: the version is known before building anything
+        etag = watchlist_etag(watchlist_ids, snapshots)
+        if etag_matches(request, etag):
+            return not_modified(etag, CACHE_CONTROL_WATCHLIST, VARY_WATCHLIST)
+        response.headers["ETag"] = etag
+        loaded_by_id = {}
+    else:
+        loaded, partial = await hydrate_watchlist(missing_ids)
         try:
-            # Try to get movie details from TMDB
-            movie = await tmdb.get_movie_details(movie_id)
-            if movie:
-                # Convert MovieDetail to Movie for response
-                movie_data = Movie(
-                    id=movie.id,
-                    title=movie.title,
-                    overview=movie.overview,
-                    poster_path=movie.poster_path,
-                    backdrop_path=movie.backdrop_path,
-                    release_date=movie.release_date,
-                    vote_average=movie.vote_average,
-                    genre_ids=movie.genre_ids,
-                    media_type=movie.media_type,
-                    trailer_url=movie.trailer_url
-                )
-                movies.append(movie_data)
-        except Exception:
-            # Skip movies that can't be fetched
-            continue
+            await save_snapshots(loaded)
+        except Exception as e:
+            logger.warning("Saving watchlist snapshots failed: %s", e)
+        loaded_by_id = {movie.id: movie for movie in loaded}
+    
+    movies = []
+    for movie_id in watchlist_ids:
+        if movie_id in snapshots:
+            movies.append(snapshot_to_movie(snapshots[movie_id]))
+        elif movie_id in loaded_by_id:
+            movies.append(loaded_by_id[movie_id])
     
     return WatchlistResponse(
         watchlist=movies,
-        count=len(movies)
+        count=len(movies),
+        partial=partial
+    )
+
+@router.post("/bulk", response_model=WatchlistBulkResponse)
+async def bulk_update_watchlist(
+    update: WatchlistBulkUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Add and remove many movies in one request"""
+    add_ids = list(dict.fromkeys(update.add))
+    remove_ids = list(dict.fromkeys(update.remove))
+    
+    if not add_ids and not remove_ids:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    if len(add_ids) + len(remove_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} movies per request")
+    if set(add_ids) & set(remove_ids):
+        raise HTTPException(status_code=400, detail="A movie can't be both added and removed")
+    
+    # Verify added movies exist in TMDB and snapshot them; no deadline, a slow
+    # lookup must not turn a valid movie into "not found"
+    movies, _ = await hydrate_watchlist(add_ids, deadline=None)
+    await save_snapshots(movies)
+    found_ids = {movie.id for movie in movies}
+    valid_add_ids = [movie_id for movie_id in add_ids if movie_id in found_ids]
+    
+    # Single atomic update: drop removed ids, then append new ids not already present
+    current = {"$ifNull": ["$watchlist", []]}
+    user = await db.users.find_one_and_update(
+        {"_id": current_user["_id"]},
+        [{"$set": {"watchlist": {"$concatArrays": [
+            {"$filter": {"input": current, "cond": {"$not": [{"$in": ["$$this", remove_ids]}]}}},
+            {"$filter": {"input": {"$literal": valid_add_ids}, "cond": {"$not": [{"$in": ["$$this", current]}]}}}
+        ]}}}],
+        projection={"watchlist": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    invalidate_user_cache(current_user["_id"])
+    
+    return WatchlistBulkResponse(
+        watchlist=user.get("watchlist", []),
+        not_found=[movie_id for movie_id in add_ids if movie_id not in found_ids]
     )
 
 @router.post("/{movie_id}", response_model=MessageResponse)
@@ -52,14 +219,6 @@ async def add_to_watchlist(
     current_user: dict = Depends(get_current_user)
 ):
     """Add movie to user's watchlist"""
-    watchlist = current_user.get("watchlist", [])
-    
-    if movie_id in watchlist:
-        raise HTTPException(
-            status_code=400,
-            detail="Movie already in watchlist"
-        )
-    
     # Verify movie exists in TMDB
     movie = await tmdb.get_movie_details(movie_id)
     if not movie:
@@ -68,12 +227,22 @@ async def add_to_watchlist(
             detail="Movie not found"
         )
     
-    # Add to watchlist
-    watchlist.append(movie_id)
-    await db.users.update_one(
+    # Store a snapshot so watchlist reads don't need TMDB
+    await save_snapshots([to_movie(movie)])
+    
+    # Add to watchlist atomically; nothing modified means it was already there
+    result = await db.users.update_one(
         {"_id": current_user["_id"]},
-        {"$set": {"watchlist": watchlist}}
+        {"$addToSet": {"watchlist": movie_id}}
     )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    if result.modified_count == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Movie already in watchlist"
+        )
+    invalidate_user_cache(current_user["_id"])
     
     return MessageResponse(message="Movie added to watchlist")
 
@@ -83,19 +252,18 @@ async def remove_from_watchlist(
     current_user: dict = Depends(get_current_user)
 ):
     """Remove movie from user's watchlist"""
-    watchlist = current_user.get("watchlist", [])
-    
-    if movie_id not in watchlist:
+    # Remove atomically; nothing modified means it wasn't there
+    result = await db.users.update_one(
+        {"_id": current_user["_id"]},
+        {"$pull": {"watchlist": movie_id}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    if result.modified_count == 0:
         raise HTTPException(
             status_code=404,
             detail="Movie not in watchlist"
         )
-    
-    # Remove from watchlist
-    watchlist.remove(movie_id)
-    await db.users.update_one(
-        {"_id": current_user["_id"]},
-        {"$set": {"watchlist": watchlist}}
-    )
+    invalidate_user_cache(current_user["_id"])
     
     return MessageResponse(message="Movie removed from watchlist")
\ No newline at end of file
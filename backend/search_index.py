@@ -0,0 +1,395 @@
+import heapq
+import logging
+import math
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+from models import Movie
+from tmdb_service import tmdb
+from tmdb_normalize import MovieRecord, materialize, media_items
+
+logger = logging.getLogger(__name__)
+
+# Local search settings
+SEARCH_INDEX_ENABLED = os.environ.get("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_MAX_DOCS = int(os.environ.get("SEARCH_INDEX_MAX_DOCS", "200000"))
+SEARCH_LOCAL_MIN_RESULTS = int(os.environ.get("SEARCH_LOCAL_MIN_RESULTS", "5"))
+SEARCH_POPULARITY_WEIGHT = float(os.environ.get("SEARCH_POPULARITY_WEIGHT", "0.3"))
+SEARCH_PAGE_SIZE = 20
+
+# BM25 parameters; title terms count TITLE_WEIGHT times
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+
+STOPWORDS = frozenset("a an and are as at be by for from in is it of on or the to with".split())
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(normalize(text)) if token not in STOPWORDS]
+
+def as_float32(value: float) -> float:
+    """value as stored in an array("f"), for comparing against stored popularity"""
+    return array("f", [value or 0.0])[0]
+
+def default_media_type(endpoint: str) -> Optional[str]:
+    """Media type of list items that don't carry their own"""
+    if endpoint.startswith(("/movie/", "/discover/movie", "/trending/movie/")):
+        return "movie"
+    if endpoint.startswith(("/tv/", "/discover/tv", "/trending/tv/")):
+        return "tv"
+    return None
+
+class _Postings:
+    """Postings of one term as packed arrays, sorted by document number"""
+    __slots__ = ("docs", "tfs")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("H")
+
+class SearchIndex:
+    """In-process inverted index over titles and overviews, ranked with BM25
+    plus a popularity boost.
+
+    Documents get increasing numbers, so appending keeps postings sorted.
+    Updating a title tombstones its old number and indexes it again; the
+    postings are compacted once tombstones pile up. The generation counts
+    changes that can alter search results.
+    """
+
+    def __init__(self, max_docs: int = SEARCH_INDEX_MAX_DOCS):
+        self.max_docs = max_docs
+        self.generation = 0
+        self._postings: Dict[str, _Postings] = {}
+        self._doc_keys: List[Optional[str]] = []
+        self._records: List[Optional[MovieRecord]] = []
+        self._doc_len = array("I")
+        self._popularity = array("f")
+        self._key_to_doc: Dict[str, int] = {}
+        self._deleted = set()
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._key_to_doc)
+
+    def add(self, record: MovieRecord, popularity: float = 0.0):
+        """Index or re-index one title"""
+        key = record.key
+        old = self._key_to_doc.get(key)
+        if old is not None:
+            if self._records[old] == record and self._popularity[old] == as_float32(popularity):
+                return
+            self._delete(old)
+        elif len(self._key_to_doc) >= self.max_docs:
+            return
+
+        terms = Counter()
+        for token in tokenize(record.title):
+            terms[token] += TITLE_WEIGHT
+        for token in tokenize(record.overview):
+            terms[token] += 1
+
+        doc = len(self._doc_keys)
+        self._doc_keys.append(key)
+        self._records.append(record)
+        length = sum(terms.values())
+        self._doc_len.append(length)
+        self._popularity.append(popularity or 0.0)
+        self._total_len += length
+        self._key_to_doc[key] = doc
+
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+            postings.docs.append(doc)
+            postings.tfs.append(min(tf, 65535))
+        self.generation += 1
+
+        if len(self._deleted) > 1000 and len(self._deleted) > len(self._key_to_doc) // 4:
+            self._compact()
+
+    def add_results(self, endpoint: str, items: Iterable[Dict[str, Any]]):
+        """Index raw TMDB list items (registered as a TMDBService results listener)"""
+        for media_type, item in media_items(items, default_media_type(endpoint)):
+            self.add(MovieRecord.from_item(item, media_type), item.get("popularity", 0))
+
+    def _delete(self, doc: int):
+        key = self._doc_keys[doc]
+        self._deleted.add(doc)
+        self._key_to_doc.pop(key, None)
+        self._total_len -= self._doc_len[doc]
+        self._records[doc] = None
+
+    def _compact(self):
+        """Rebuild postings without tombstoned documents"""
+        live = [(self._records[doc], self._popularity[doc]) for doc in sorted(self._key_to_doc.values())]
+        generation = self.generation
+        self.__init__(self.max_docs)
+        for record, popularity in live:
+            self.add(record, popularity)
+        # Same results as before, so keep cached pages valid
+        self.generation = generation
+
+    def search(self, query: str, page: int = 1, min_results: int = SEARCH_LOCAL_MIN_RESULTS) -> Optional[List[Movie]]:
+        """Page of titles matching every query term, best first; None when the page is left to TMDB"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        live_docs = len(self._key_to_doc)
+        if not terms or not live_docs:
+            return None
+
+        avg_len = self._total_len / live_docs if live_docs else 1.0
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            df = len(postings.docs)
+            idf = math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(postings.docs, postings.tfs):
+                if doc in self._deleted:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc] / avg_len)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matched[doc] = matched.get(doc, 0) + 1
+
+        # Only full pages are answered locally; TMDB knows titles the index
+        # has never seen, so a short or out-of-range page goes to TMDB
+        hits = [doc for doc, count in matched.items() if count == len(terms)]
+        start = (page - 1) * SEARCH_PAGE_SIZE
+        if len(hits) < max(min_results, start + SEARCH_PAGE_SIZE):
+            return None
+
+        hits.sort(key=lambda doc: scores[doc] + SEARCH_POPULARITY_WEIGHT * math.log1p(self._popularity[doc]), reverse=True)
+        return materialize([self._records[doc] for doc in hits[start:start + SEARCH_PAGE_SIZE]])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._key_to_doc),
+            "terms": len(self._postings),
+            "postings": sum(len(p.docs) for p in self._postings.values()),
+            "tombstones": len(self._deleted),
+            "generation": self.generation,
+        }
+
+# Process-wide index fed by every TMDB list page the service loads
+search_index = SearchIndex()
+if SEARCH_INDEX_ENABLED:
+    tmdb.add_results_listener(search_index.add_results)
+
+# Typeahead settings
+SUGGEST_TOP_K = int(os.environ.get("SUGGEST_TOP_K", "10"))
+SUGGEST_MAX_WORD_STARTS = 4  # besides the full title, also match from its next few words
+
+def suggest_key(text: str) -> str:
+    """Normalized form used for prefix matching (stopwords kept)"""
+    return " ".join(_TOKEN_RE.findall(normalize(text)))
+
+class _TrieNode:
+    __slots__ = ("edges", "top", "docs")
+
+    def __init__(self):
+        self.edges: Optional[Dict[str, Any]] = None  # first char -> (edge label, child)
+        self.top = array("I")  # best documents in this subtree, most popular first
+        self.docs: Optional[array] = None  # documents whose text ends at this node
+
+class SuggestIndex:
+    """Radix trie over normalized titles for prefix typeahead.
+
+    Every node keeps the top-k most popular documents of its subtree, so a
+    lookup is a walk down the prefix and costs O(len(prefix)). Titles are
+    also reachable from the start of their next few words ("dark" finds
+    "The Dark Knight"). A node's top-k is derived from the documents ending
+    at it and its children's top-k, and is recomputed bottom-up along every
+    path a title touches whenever it is added, re-ranked or renamed, so
+    popularity drops and removals are reflected exactly. The generation
+    counts changes that can alter suggestions.
+    """
+
+    def __init__(self, top_k: int = SUGGEST_TOP_K):
+        self.top_k = top_k
+        self.generation = 0
+        self._root = _TrieNode()
+        self._ids = array("I")
+        self._titles: List[str] = []
+        self._media_types: List[str] = []
+        self._popularity = array("f")
+        self._key_to_doc: Dict[str, int] = {}
+        self._dead = set()
+
+    def __len__(self) -> int:
+        return len(self._key_to_doc)
+
+    @staticmethod
+    def _texts(title: str) -> List[str]:
+        """Indexed forms of a title: the whole title and its next few word starts"""
+        words = suggest_key(title).split(" ")
+        return list(dict.fromkeys(" ".join(words[i:]) for i in range(min(len(words), SUGGEST_MAX_WORD_STARTS + 1))))
+
+    def add(self, item_id: int, media_type: str, title: str, popularity: float = 0.0):
+        """Add a title or update its popularity"""
+        if not suggest_key(title):
+            return
+        key = f"{media_type}:{item_id}"
+        doc = self._key_to_doc.get(key)
+        if doc is not None and self._titles[doc] == title:
+            if self._popularity[doc] == as_float32(popularity):
+                return
+            self.generation += 1
+            self._popularity[doc] = popularity or 0.0
+            for text in self._texts(title):
+                self._refresh(self._path(text), doc)
+            return
+
+        self.generation += 1
+        if doc is not None:
+            self._remove(doc)
+        doc = len(self._titles)
+        self._ids.append(item_id)
+        self._titles.append(title)
+        self._media_types.append(media_type)
+        self._popularity.append(popularity or 0.0)
+        self._key_to_doc[key] = doc
+        for text in self._texts(title):
+            self._refresh(self._insert(text, doc), doc)
+
+        if len(self._dead) > 1000 and len(self._dead) > len(self._key_to_doc) // 4:
+            self._rebuild()
+
+    def add_results(self, endpoint: str, items: Iterable[Dict[str, Any]]):
+        """Index raw TMDB list items (registered as a TMDBService results listener)"""
+        for media_type, item in media_items(items, default_media_type(endpoint)):
+            title = item.get("title" if media_type == "movie" else "name") or ""
+            self.add(item["id"], media_type, title, item.get("popularity", 0))
+
+    def _remove(self, doc: int):
+        """Take a renamed title's old paths out of the trie"""
+        for text in self._texts(self._titles[doc]):
+            path = self._path(text)
+            path[-1].docs.remove(doc)
+            self._refresh(path, doc)
+        self._dead.add(doc)
+
+    def _refresh(self, path: List[_TrieNode], doc: int):
+        """Recompute top-k bottom-up along a root-to-node path after doc changed.
+
+        Stops early once a node's top-k is unchanged and never held doc:
+        nothing above it can change through this path then.
+        """
+        popularity = self._popularity
+        for node in reversed(path):
+            candidates = set(node.docs or ())
+            if node.edges:
+                for _, child in node.edges.values():
+                    candidates.update(child.top)
+            top = array("I", heapq.nlargest(self.top_k, candidates, key=lambda d: popularity[d]))
+            if top == node.top and doc not in top:
+                return
+            node.top = top
+
+    def _path(self, text: str) -> List[_TrieNode]:
+        """Nodes from the root to the node where an indexed text ends"""
+        node = self._root
+        path = [node]
+        i = 0
+        while i < len(text):
+            label, node = node.edges[text[i]]
+            path.append(node)
+            i += len(label)
+        return path
+
+    def _insert(self, text: str, doc: int) -> List[_TrieNode]:
+        """Add doc at the end of text's path (splitting edges as needed), returning the path"""
+        node = self._root
+        path = [node]
+        i = 0
+        while i < len(text):
+            edge = node.edges.get(text[i]) if node.edges else None
+            if edge is None:
+                leaf = _TrieNode()
+                if node.edges is None:
+                    node.edges = {}
+                node.edges[text[i]] = (text[i:], leaf)
+                path.append(leaf)
+                node = leaf
+                break
+
+            label, child = edge
+            j = 0
+            while j < len(label) and i + j < len(text) and label[j] == text[i + j]:
+                j += 1
+            if j < len(label):
+                # Split the edge at the first differing character
+                middle = _TrieNode()
+                middle.top = array("I", child.top)
+                middle.edges = {label[j]: (label[j:], child)}
+                node.edges[text[i]] = (label[:j], middle)
+                child = middle
+            path.append(child)
+            node = child
+            i += j
+
+        if node.docs is None:
+            node.docs = array("I")
+        node.docs.append(doc)
+        return path
+
+    def _rebuild(self):
+        live = [
+            (self._ids[doc], self._media_types[doc], self._titles[doc], self._popularity[doc])
+            for doc in sorted(self._key_to_doc.values())
+        ]
+        generation = self.generation
+        self.__init__(self.top_k)
+        for entry in live:
+            self.add(*entry)
+        self.generation = generation
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[Dict[str, Any]]:
+        """Most popular titles starting with prefix (at a title or word start)"""
+        text = suggest_key(prefix)
+        if not text:
+            return []
+        # Keep a trailing space so "star " only matches the whole word
+        if prefix[-1:].isspace():
+            text += " "
+
+        node = self._root
+        i = 0
+        while i < len(text):
+            edge = node.edges.get(text[i]) if node.edges else None
+            if edge is None:
+                return []
+            label, child = edge
+            rest = text[i:]
+            if rest.startswith(label):
+                i += len(label)
+                node = child
+            elif label.startswith(rest):
+                node = child
+                break
+            else:
+                return []
+
+        return [
+            {"id": self._ids[doc], "title": self._titles[doc], "media_type": self._media_types[doc]}
+            for doc in node.top[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"titles": len(self._key_to_doc), "dead": len(self._dead), "generation": self.generation}
+
+# Process-wide typeahead index, fed like the search index
+suggest_index = SuggestIndex()
+if SEARCH_INDEX_ENABLED:
+    tmdb.add_results_listener(suggest_index.add_results)
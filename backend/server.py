@@ -1,8 +1,12 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+import secrets
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -16,10 +20,13 @@ client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app
+from responses import DefaultJSONResponse
+
 app = FastAPI(
     title="Netflix Clone API",
     description="A Netflix clone backend with TMDB integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse
 )
 
 # CORS middleware
@@ -31,8 +38,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Flag responses that were built from stale TMDB data while TMDB was unavailable
+# (plain ASGI middleware: no extra task or body streaming per request)
+class StaleResponseMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stale = track_stale()
+        
+        async def send_with_stale_headers(message):
+            if message["type"] == "http.response.start" and stale:
+                headers = MutableHeaders(scope=message)
+                headers["X-Data-Stale"] = "true"
+                headers["Warning"] = '110 - "Response is Stale"'
+            await send(message)
+        
+        await self.app(scope, receive, send_with_stale_headers)
+
+app.add_middleware(StaleResponseMiddleware)
+
 # Import and include routers
-from routes import auth, movies, watchlist, genres
+from routes import auth, movies, watchlist, genres, home
+from tmdb_service import tmdb, track_stale
+from indexes import ensure_indexes
+from auth import password_hash_pool
+from catalog import catalog
+from search_index import search_index, suggest_index
+from warmup import warmup
+from featured import featured
+from responses import response_cache
 
 # Create API router
 api_router = APIRouter(prefix="/api")
@@ -42,6 +81,7 @@ api_router.include_router(auth.router)
 api_router.include_router(movies.router)
 api_router.include_router(watchlist.router)
 api_router.include_router(genres.router)
+api_router.include_router(home.router)
 
 # Health check endpoint
 @api_router.get("/")
@@ -56,6 +96,42 @@ async def health_check():
         "tmdb_integration": "active"
     }
 
+@api_router.get("/ready")
+async def readiness_check():
+    """Ready once the startup warmup has filled the caches"""
+    status_code = 200 if warmup.ready else 503
+    return JSONResponse(
+        status_code=status_code,
+        content=jsonable_encoder({"ready": warmup.ready, "warmup": warmup.status()})
+    )
+
+# Operational metrics are only served with this bearer token (disabled when unset)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+async def require_metrics_token(authorization: str = Header("")):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+@api_router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    return {
+        "password_hashing": password_hash_pool.stats(),
+        "tmdb_cache": tmdb.cache.stats(),
+        "tmdb_keys": tmdb.key_pool.stats(),
+        "tmdb_circuit": tmdb.breaker.stats(),
+        "catalog": catalog.progress,
+        "search_index": search_index.stats(),
+        "suggest_index": suggest_index.stats(),
+        "featured": featured.status(),
+        "response_cache": response_cache.stats()
+    }
+
 # Include the API router
 app.include_router(api_router)
 
@@ -69,10 +145,20 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting Netflix Clone API...")
+    await ensure_indexes(db)
+    await tmdb.startup(db)
+    await catalog.startup(db)
+    featured.start()
+    warmup.start()
     logger.info("TMDB integration initialized")
     logger.info("Database connection established")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     logger.info("Shutting down Netflix Clone API...")
+    await warmup.close()
+    await featured.close()
+    await catalog.close()
+    await tmdb.close()
+    password_hash_pool.shutdown()
     client.close()
\ No newline at end of file
@@ -0,0 +1,177 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from pydantic import TypeAdapter
+from models import Movie
+
+IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+
+# One shared string per image size; every URL is prefix + path
+_image_prefixes: Dict[str, str] = {}
+
+# Validates a whole page in a single pydantic-core call
+_movie_page = TypeAdapter(List[Movie])
+
+def image_prefix(size: str) -> str:
+    prefix = _image_prefixes.get(size)
+    if prefix is None:
+        prefix = _image_prefixes[size] = sys.intern(f"{IMAGE_BASE_URL}/{size}")
+    return prefix
+
+POSTER_PREFIX = image_prefix("w500")
+BACKDROP_PREFIX = image_prefix("original")
+
+def image_url(path: Optional[str], size: str = "w500") -> str:
+    """Full image URL for a TMDB path, "" when there is none"""
+    if not path:
+        return ""
+    return image_prefix(size) + path
+
+def media_items(results: Iterable[Dict[str, Any]], default_media_type: Optional[str] = "movie") -> List[Tuple[str, Dict[str, Any]]]:
+    """(media_type, item) for the movies and TV shows of a results page; people are skipped"""
+    items = []
+    for item in results:
+        media_type = item.get("media_type") or default_media_type
+        if (media_type == "movie" or media_type == "tv") and "id" in item:
+            items.append((media_type, item))
+    return items
+
+def item_fields(item: Dict[str, Any], media_type: str, trailer_url: Optional[str] = None) -> Dict[str, Any]:
+    """Movie fields of a raw TMDB movie or TV item (title/name and release/first-air date unified)"""
+    is_movie = media_type == "movie"
+    poster = item.get("poster_path")
+    backdrop = item.get("backdrop_path")
+    return {
+        "id": item["id"],
+        "title": item.get("title" if is_movie else "name") or "",
+        "overview": item.get("overview") or "",
+        "poster_path": POSTER_PREFIX + poster if poster else "",
+        "backdrop_path": BACKDROP_PREFIX + backdrop if backdrop else "",
+        "release_date": item.get("release_date" if is_movie else "first_air_date"),
+        "vote_average": item.get("vote_average") or 0,
+        "genre_ids": item.get("genre_ids") or [],
+        "media_type": media_type,
+        "trailer_url": trailer_url,
+    }
+
+def movie_from_fields(fields: Dict[str, Any]) -> Movie:
+    """Build a Movie from stored, already-normalized fields (extra keys are ignored)"""
+    return Movie.model_validate(fields)
+
+def normalize_results(items: Sequence[Tuple[str, Dict[str, Any]]],
+                      trailers: Optional[Sequence[Optional[str]]] = None) -> List[Movie]:
+    """Convert a page of (media_type, item) pairs into Movies in one pass.
+
+    The field dicts are built in plain Python and the page is validated in
+    one batch; on pydantic 2 this beats both per-item Movie(...) calls and
+    model_construct, which runs in Python rather than pydantic-core.
+    """
+    if trailers is None:
+        trailers = [None] * len(items)
+    return _movie_page.validate_python([
+        item_fields(item, media_type, trailer_url)
+        for (media_type, item), trailer_url in zip(items, trailers)
+    ])
+
+def _relative(url: Optional[str], prefix: str) -> Optional[str]:
+    """Path part of a stored image URL"""
+    if not url:
+        return None
+    if url.startswith(prefix):
+        return url[len(prefix):]
+    return url
+
+def _pack_genres(genre_ids: Optional[List[int]]) -> bytes:
+    if not genre_ids:
+        return b""
+    return array("H", genre_ids).tobytes()
+
+def _unpack_genres(packed: bytes) -> List[int]:
+    genre_ids = array("H")
+    genre_ids.frombytes(packed)
+    return genre_ids.tolist()
+
+class MovieRecord:
+    """Compact in-process form of a title, for stores holding many of them.
+
+    Image paths are kept relative to the shared size prefixes, genre ids are
+    packed into bytes and repeated strings (media type, dates) are interned.
+    The public Movie is only built by materialize() when a response needs it.
+    """
+    __slots__ = ("id", "media_type", "title", "overview", "poster", "backdrop",
+                 "release_date", "vote_average", "genres")
+
+    def __init__(self, id: int, media_type: str, title: str, overview: str, poster: Optional[str],
+                 backdrop: Optional[str], release_date: Optional[str], vote_average: float, genre_ids: Optional[List[int]]):
+        self.id = id
+        self.media_type = sys.intern(media_type)
+        self.title = title
+        self.overview = overview
+        self.poster = poster or None
+        self.backdrop = backdrop or None
+        self.release_date = sys.intern(release_date) if release_date else release_date
+        self.vote_average = vote_average
+        self.genres = _pack_genres(genre_ids)
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any], media_type: str) -> "MovieRecord":
+        """Record for a raw TMDB movie or TV item"""
+        is_movie = media_type == "movie"
+        return cls(
+            item["id"],
+            media_type,
+            item.get("title" if is_movie else "name") or "",
+            item.get("overview") or "",
+            item.get("poster_path"),
+            item.get("backdrop_path"),
+            item.get("release_date" if is_movie else "first_air_date"),
+            item.get("vote_average") or 0.0,
+            item.get("genre_ids"),
+        )
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, Any]) -> "MovieRecord":
+        """Record for stored Movie fields (full image URLs)"""
+        return cls(
+            fields["id"],
+            fields.get("media_type") or "movie",
+            fields.get("title") or "",
+            fields.get("overview") or "",
+            _relative(fields.get("poster_path"), POSTER_PREFIX),
+            _relative(fields.get("backdrop_path"), BACKDROP_PREFIX),
+            fields.get("release_date"),
+            fields.get("vote_average") or 0.0,
+            fields.get("genre_ids"),
+        )
+
+    @property
+    def key(self) -> str:
+        return f"{self.media_type}:{self.id}"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MovieRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def fields(self, trailer_url: Optional[str] = None) -> Dict[str, Any]:
+        """Public Movie fields"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "overview": self.overview,
+            "poster_path": POSTER_PREFIX + self.poster if self.poster else "",
+            "backdrop_path": BACKDROP_PREFIX + self.backdrop if self.backdrop else "",
+            "release_date": self.release_date,
+            "vote_average": self.vote_average,
+            "genre_ids": _unpack_genres(self.genres),
+            "media_type": self.media_type,
+            "trailer_url": trailer_url,
+        }
+
+def materialize(records: Sequence[MovieRecord], trailers: Optional[Sequence[Optional[str]]] = None) -> List[Movie]:
+    """Build the public Movies for a page of records in one batch"""
+    if trailers is None:
+        trailers = [None] * len(records)
+    return _movie_page.validate_python([
+        record.fields(trailer_url) for record, trailer_url in zip(records, trailers)
+    ])
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given (0-based) attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class ApiKeyState:
+    """Token bucket and health of one API key"""
+    __slots__ = ("key", "tokens", "updated_at", "cooldown_until", "strikes", "requests", "throttled")
+
+    def __init__(self, key: str, burst: float):
+        self.key = key
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.strikes = 0  # consecutive 429s, drives the backoff
+        self.requests = 0
+        self.throttled = 0
+
+
+class KeyPool:
+    """Spreads requests over several API keys.
+
+    Each key has a token bucket refilled at `rate` requests per second up
+    to `burst`. A key that gets a 429 cools down for the Retry-After time,
+    or an exponential, jittered backoff when TMDB sends none, and is skipped
+    until then. Of the usable keys the one with the most tokens is picked,
+    which keeps load even across keys.
+    """
+
+    def __init__(self, keys: List[str], rate: float = 40.0, burst: float = 40.0,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0):
+        self.rate = rate
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.keys = [ApiKeyState(key, burst) for key in dict.fromkeys(k for k in keys if k)]
+        if not self.keys:
+            raise ValueError("KeyPool needs at least one API key")
+
+    def _refill(self, state: ApiKeyState, now: float):
+        state.tokens = min(self.burst, state.tokens + (now - state.updated_at) * self.rate)
+        state.updated_at = now
+
+    def try_acquire(self) -> Optional[ApiKeyState]:
+        """Take a token from the best usable key, or None if every key is busy"""
+        now = time.monotonic()
+        best = None
+        for state in self.keys:
+            if state.cooldown_until > now:
+                continue
+            self._refill(state, now)
+            if state.tokens >= 1 and (best is None or state.tokens > best.tokens):
+                best = state
+        if best is not None:
+            best.tokens -= 1
+            best.requests += 1
+        return best
+
+    def next_available_in(self) -> float:
+        """Seconds until some key will have a token"""
+        now = time.monotonic()
+        waits = []
+        for state in self.keys:
+            self._refill(state, now)
+            cooldown = max(0.0, state.cooldown_until - now)
+            refill = max(0.0, (1 - state.tokens) / self.rate) if self.rate > 0 else float("inf")
+            waits.append(max(cooldown, refill))
+        return min(waits)
+
+    async def acquire(self, max_wait: float) -> Optional[ApiKeyState]:
+        """Wait up to max_wait seconds for a usable key"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            state = self.try_acquire()
+            if state is not None:
+                return state
+            wait = self.next_available_in()
+            if time.monotonic() + wait > deadline:
+                return None
+            await asyncio.sleep(wait)
+
+    def report_success(self, state: ApiKeyState):
+        state.strikes = 0
+
+    def report_rate_limited(self, state: ApiKeyState, retry_after: Optional[float] = None):
+        """Cool a key down after a 429"""
+        state.throttled += 1
+        if retry_after is None:
+            retry_after = backoff_delay(state.strikes, self.backoff_base, self.backoff_cap)
+        state.strikes += 1
+        state.tokens = 0
+        state.cooldown_until = time.monotonic() + retry_after
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        # Keys are identified by position only, never by any part of the key itself
+        return [
+            {
+                "key": index,
+                "tokens": round(state.tokens, 2),
+                "cooldown_remaining": round(max(0.0, state.cooldown_until - now), 2),
+                "requests": state.requests,
+                "throttled": state.throttled,
+            }
+            for index, state in enumerate(self.keys)
+        ]
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by error rate and slow-call rate.
+
+    Outcomes of the last `window` calls are kept. Once at least `min_calls`
+    are recorded and the error or slow-call rate reaches its threshold the
+    circuit opens and calls fail fast for `open_seconds`. After that up to
+    `half_open_probes` trial calls are let through: if they all succeed the
+    circuit closes, any failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 50, min_calls: int = 10, error_threshold: float = 0.5,
+                 slow_call_seconds: float = 3.0, slow_threshold: float = 0.8,
+                 open_seconds: float = 30.0, half_open_probes: int = 3):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_threshold = slow_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: "deque" = deque(maxlen=window)  # (failed, slow) per call
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def record_success(self, latency: float):
+        slow = latency >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._transition(self.CLOSED)
+            return
+        self._record(False, slow)
+
+    def release(self):
+        """Give back a half-open probe slot for a call that never reached upstream"""
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._open()
+            return
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool):
+        self._outcomes.append((failed, slow))
+        if self.state != self.CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        error_rate = sum(1 for f, _ in self._outcomes if f) / calls
+        slow_rate = sum(1 for _, s in self._outcomes if s) / calls
+        if error_rate >= self.error_threshold or slow_rate >= self.slow_threshold:
+            self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning("TMDB circuit breaker %s -> %s", self.state, state)
+        self.state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == self.CLOSED:
+            self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "window_calls": calls,
+            "error_rate": round(sum(1 for f, _ in self._outcomes if f) / calls, 4) if calls else 0.0,
+            "slow_rate": round(sum(1 for _, s in self._outcomes if s) / calls, 4) if calls else 0.0,
+        }
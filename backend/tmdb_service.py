@@ -1,227 +1,481 @@
 import httpx
 import os
-from typing import List, Dict, Any, Optional
+import re
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from urllib.parse import urlencode
 from fastapi import HTTPException
 from models import Movie, TVShow, Genre, MovieDetail
+from cache import TTLCache, SingleFlight, MongoCache
+from tmdb_resilience import KeyPool, CircuitBreaker, backoff_delay, parse_retry_after
+from tmdb_normalize import IMAGE_BASE_URL, image_url, media_items, normalize_results
+from contextvars import ContextVar
+import time
 import asyncio
 
+logger = logging.getLogger(__name__)
+
+# HTTP connection pool settings (one pool shared by the whole process)
+HTTP_MAX_CONNECTIONS = int(os.environ.get("TMDB_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("TMDB_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("TMDB_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.environ.get("TMDB_HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("TMDB_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP2_ENABLED = os.environ.get("TMDB_HTTP2", "true").lower() == "true"
+
+# API key pool: per-key token bucket, retry and cooldown settings
+KEY_POOL_RATE = float(os.environ.get("TMDB_KEY_RATE", "40"))  # requests per second per key
+KEY_POOL_BURST = float(os.environ.get("TMDB_KEY_BURST", "40"))
+KEY_POOL_MAX_WAIT = float(os.environ.get("TMDB_KEY_MAX_WAIT", "2"))  # seconds to wait for a free key
+KEY_POOL_MAX_ATTEMPTS = int(os.environ.get("TMDB_MAX_ATTEMPTS", "3"))
+KEY_COOLDOWN_CAP = float(os.environ.get("TMDB_KEY_COOLDOWN_CAP", "60"))
+RETRY_BACKOFF_BASE = float(os.environ.get("TMDB_RETRY_BACKOFF_BASE", "0.25"))
+RETRY_BACKOFF_CAP = float(os.environ.get("TMDB_RETRY_BACKOFF_CAP", "2"))
+
+# Circuit breaker around TMDB calls
+BREAKER_WINDOW = int(os.environ.get("TMDB_BREAKER_WINDOW", "50"))
+BREAKER_MIN_CALLS = int(os.environ.get("TMDB_BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_THRESHOLD = float(os.environ.get("TMDB_BREAKER_ERROR_THRESHOLD", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("TMDB_BREAKER_SLOW_CALL_SECONDS", "3"))
+BREAKER_SLOW_THRESHOLD = float(os.environ.get("TMDB_BREAKER_SLOW_THRESHOLD", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("TMDB_BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.environ.get("TMDB_BREAKER_HALF_OPEN_PROBES", "3"))
+
+# Trailer fan-out limits (per list request and across the whole process)
+TRAILER_CONCURRENCY_PER_REQUEST = int(os.environ.get("TMDB_TRAILER_CONCURRENCY_PER_REQUEST", "10"))
+TRAILER_CONCURRENCY_GLOBAL = int(os.environ.get("TMDB_TRAILER_CONCURRENCY_GLOBAL", "50"))
+
+# Response cache settings
+CACHE_ENABLED = os.environ.get("TMDB_CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_ENTRIES = int(os.environ.get("TMDB_CACHE_MAX_ENTRIES", "5000"))
+CACHE_STALE_TTL = float(os.environ.get("TMDB_CACHE_STALE_TTL", "3600"))
+L2_CACHE_ENABLED = os.environ.get("TMDB_L2_CACHE_ENABLED", "false").lower() == "true"
+L2_CACHE_COLLECTION = os.environ.get("TMDB_L2_CACHE_COLLECTION", "tmdb_cache")
+
+# TTL in seconds per endpoint family, first match wins (0 disables caching)
+CACHE_TTLS = [
+    (re.compile(r"^/genre/"), float(os.environ.get("TMDB_CACHE_TTL_GENRES", "86400"))),
+    (re.compile(r"^/(movie|tv)/\d+/videos$"), float(os.environ.get("TMDB_CACHE_TTL_VIDEOS", "43200"))),
+    (re.compile(r"^/(movie|tv)/\d+$"), float(os.environ.get("TMDB_CACHE_TTL_DETAILS", "21600"))),
+    (re.compile(r"^/trending/"), float(os.environ.get("TMDB_CACHE_TTL_TRENDING", "1800"))),
+    (re.compile(r"^/(movie/popular|discover/)"), float(os.environ.get("TMDB_CACHE_TTL_LISTS", "3600"))),
+    (re.compile(r"^/search/"), float(os.environ.get("TMDB_CACHE_TTL_SEARCH", "600"))),
+]
+
+def cache_ttl_for(endpoint: str) -> float:
+    """Cache TTL for an endpoint, 0 if it should not be cached"""
+    for pattern, ttl in CACHE_TTLS:
+        if pattern.match(endpoint):
+            return ttl
+    return 0
+
+def cache_key_for(endpoint: str, params: Optional[Dict] = None) -> str:
+    """Stable cache key from endpoint and params (the api_key is never part of it)"""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "api_key")
+    return f"{endpoint}?{urlencode(items)}" if items else endpoint
+
+def popular_request(page: int) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a popular movies page"""
+    return "/movie/popular", {"page": page}
+
+def trending_request(media_type: str, time_window: str) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a trending list"""
+    return f"/trending/{media_type}/{time_window}", {}
+
+def genre_request(genre_id: int, page: int) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a discover-by-genre page"""
+    return "/discover/movie", {"with_genres": genre_id, "page": page, "sort_by": "popularity.desc"}
+
+def search_request(query: str, page: int) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a search page"""
+    return "/search/multi", {"query": query, "page": page}
+
+def details_request(media_type: str, item_id: int) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a detail payload (videos embedded)"""
+    return f"/{media_type}/{item_id}", {"append_to_response": "videos"}
+
+def videos_request(media_type: str, item_id: int) -> Tuple[str, Dict[str, Any]]:
+    """TMDB endpoint and params behind a title's videos"""
+    return f"/{media_type}/{item_id}/videos", {}
+
+# Per-request marker set when a response used stale fallback data (see track_stale)
+_stale_marker: ContextVar[Optional[list]] = ContextVar("tmdb_stale_marker", default=None)
+
+def track_stale() -> list:
+    """Start tracking stale fallbacks for the current request; the returned list is non-empty if any happened"""
+    marker = []
+    _stale_marker.set(marker)
+    return marker
+
+def served_stale() -> bool:
+    """Whether the current request has used stale fallback data so far"""
+    return bool(_stale_marker.get())
+
+def _mark_stale(key: str):
+    marker = _stale_marker.get()
+    if marker is not None:
+        marker.append(key)
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 class TMDBService:
     def __init__(self):
         self.api_key = os.environ.get("TMDB_API_KEY", "c8dea14dc917687ac631a52620e4f7ad")
         self.backup_keys = [
             os.environ.get("TMDB_BACKUP_KEY_1", "3cb41ecea3bf606c56552db3d17adefd"),
-        ]
+        ] + [key.strip() for key in os.environ.get("TMDB_BACKUP_KEYS", "").split(",") if key.strip()]
         self.base_url = "https://api.themoviedb.org/3"
-        self.image_base_url = "https://image.tmdb.org/t/p"
-        self.current_key_index = 0
+        self.image_base_url = IMAGE_BASE_URL
+        self.key_pool = KeyPool(
+            [self.api_key] + self.backup_keys,
+            rate=KEY_POOL_RATE,
+            burst=KEY_POOL_BURST,
+            backoff_base=RETRY_BACKOFF_BASE,
+            backoff_cap=KEY_COOLDOWN_CAP
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.breaker = CircuitBreaker(
+            window=BREAKER_WINDOW,
+            min_calls=BREAKER_MIN_CALLS,
+            error_threshold=BREAKER_ERROR_THRESHOLD,
+            slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+            slow_threshold=BREAKER_SLOW_THRESHOLD,
+            open_seconds=BREAKER_OPEN_SECONDS,
+            half_open_probes=BREAKER_HALF_OPEN_PROBES
+        )
+        self._trailer_limit = asyncio.Semaphore(TRAILER_CONCURRENCY_GLOBAL)
+        self.cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, stale_ttl=CACHE_STALE_TTL)
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._inflight = SingleFlight()
+        self.l2_cache: Optional[MongoCache] = None
+        self._results_listeners: List[Callable[[str, List[Dict[str, Any]]], None]] = []
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client used for all TMDB calls"""
+        self.http2 = HTTP2_ENABLED and _http2_available()
+        if HTTP2_ENABLED and not self.http2:
+            logger.warning("TMDB_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=self.http2,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
     
-    async def _make_request(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
-        """Make API request with fallback to backup keys on rate limit"""
-        if params is None:
-            params = {}
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created lazily if startup() was not called"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def startup(self, db=None):
+        """Open the shared connection pool and the optional MongoDB L2 cache (called from the app startup hook)"""
+        if db is not None and L2_CACHE_ENABLED and CACHE_ENABLED and self.l2_cache is None:
+            self.l2_cache = MongoCache(db[L2_CACHE_COLLECTION], stale_ttl=CACHE_STALE_TTL)
+            try:
+                await self.l2_cache.ensure_indexes()
+                logger.info("TMDB L2 cache enabled (collection=%s)", L2_CACHE_COLLECTION)
+            except Exception as e:
+                logger.warning("TMDB L2 cache disabled, index setup failed: %s", e)
+                self.l2_cache = None
         
-        for attempt in range(len([self.api_key] + self.backup_keys)):
-            current_key = self.api_key if attempt == 0 else self.backup_keys[attempt - 1]
-            params["api_key"] = current_key
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+            logger.info(
+                "TMDB HTTP pool ready (http2=%s, max_connections=%d, keepalive=%d)",
+                self.http2,
+                HTTP_MAX_CONNECTIONS,
+                HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            )
+    
+    async def close(self):
+        """Close the shared connection pool (called from the app shutdown hook)"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        if self.l2_cache is not None:
+            await self.l2_cache.close()
+            self.l2_cache = None
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    async def _make_request(self, endpoint: str, params: Dict = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Make API request through the response cache"""
+        ttl = cache_ttl_for(endpoint) if CACHE_ENABLED else 0
+        key = cache_key_for(endpoint, params)
+        if not ttl:
+            return await self._load(key, endpoint, params, ttl, timeout)
+        
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry.is_fresh():
+                return entry.value
+            if entry.is_servable():
+                # Serve stale data and refresh it in the background
+                self._schedule_refresh(key, endpoint, params, ttl)
+                return entry.value
+        
+        try:
+            return await self._load(key, endpoint, params, ttl, timeout)
+        except HTTPException as e:
+            # TMDB unavailable or circuit open: fall back to the last known good payload
+            if e.status_code == 503 and entry is not None:
+                logger.warning("Serving stale %s: %s", key, e.detail)
+                _mark_stale(key)
+                return entry.value
+            raise
+    
+    def cache_version(self, endpoint: str, params: Dict = None) -> Optional[float]:
+        """Identity of the cached payload for a request (its expiry), None if nothing servable is cached"""
+        entry = self.cache.peek(cache_key_for(endpoint, params))
+        if entry is None or not entry.is_servable():
+            return None
+        return entry.expires_at
+    
+    def add_results_listener(self, listener: Callable[[str, List[Dict[str, Any]]], None]):
+        """Call listener(endpoint, results) for every list payload loaded from L2 or TMDB (searches excluded)"""
+        self._results_listeners.append(listener)
+    
+    def _notify_results(self, endpoint: str, data: Dict[str, Any]):
+        results = data.get("results")
+        # Search pages are query-dependent slices; indexing them would let the
+        # local index answer later pages of the same query with partial data
+        if not results or not isinstance(results, list) or endpoint.endswith("/videos") or endpoint.startswith("/search/"):
+            return
+        for listener in self._results_listeners:
+            try:
+                listener(endpoint, results)
+            except Exception as e:
+                logger.warning("Results listener failed for %s: %s", endpoint, e)
+    
+    async def _load(self, key: str, endpoint: str, params: Optional[Dict], ttl: float, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Fetch from the L2 cache or TMDB once per key, however many callers are waiting on it"""
+        async def load():
+            if ttl and self.l2_cache is not None:
+                # Another worker may already have fetched this key
+                hit = await self.l2_cache.get(key)
+                if hit is not None:
+                    data, remaining = hit
+                    self.cache.set(key, data, remaining)
+                    self._notify_results(endpoint, data)
+                    return data
+            
+            data = await self._fetch(endpoint, params, timeout)
+            self._notify_results(endpoint, data)
+            if ttl:
+                self.cache.set(key, data, ttl)
+                if self.l2_cache is not None:
+                    self.l2_cache.set(key, data, ttl)
+            return data
+        
+        return await self._inflight.do(key, load)
+    
+    def _schedule_refresh(self, key: str, endpoint: str, params: Optional[Dict], ttl: float):
+        """Start one background refresh per key (stale-while-revalidate)"""
+        if key in self._refreshing:
+            return
+        
+        async def refresh():
+            try:
+                await self._load(key, endpoint, params, ttl)
+            except Exception as e:
+                logger.warning("Background refresh of %s failed: %s", key, e)
+            finally:
+                self._refreshing.pop(key, None)
+        
+        self._refreshing[key] = asyncio.create_task(refresh())
+    
+    async def _fetch(self, endpoint: str, params: Dict = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Make API request, spreading load over the key pool and retrying on rate limits"""
+        # Copy so the caller's dict never picks up an api_key
+        params = dict(params or {})
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(KEY_POOL_MAX_ATTEMPTS):
+            if not self.breaker.allow_request():
+                raise HTTPException(
+                    status_code=503,
+                    detail="TMDB API unavailable (circuit open)",
+                    headers={"Retry-After": str(int(BREAKER_OPEN_SECONDS))}
+                )
+            
+            key = await self.key_pool.acquire(KEY_POOL_MAX_WAIT)
+            if key is None:
+                # Every key is cooling down or out of tokens; TMDB itself is fine
+                self.breaker.release()
+                retry_after = max(1, int(self.key_pool.next_available_in() + 0.5))
+                raise HTTPException(
+                    status_code=503, 
+                    detail="TMDB API rate limit exceeded. Please try again later.",
+                    headers={"Retry-After": str(retry_after)}
+                )
+            params["api_key"] = key.key
             
+            started = time.monotonic()
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(f"{self.base_url}{endpoint}", params=params)
-                    
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 429:  # Rate limit exceeded
-                        if attempt < len(self.backup_keys):
-                            continue  # Try next key
-                        else:
-                            raise HTTPException(
-                                status_code=503, 
-                                detail="TMDB API rate limit exceeded. Please try again later."
-                            )
-                    else:
-                        response.raise_for_status()
+                response = await self.client.get(endpoint, params=params, timeout=request_timeout)
             except httpx.RequestError as e:
-                if attempt == len(self.backup_keys):  # Last attempt
-                    raise HTTPException(status_code=503, detail=f"TMDB API unavailable: {str(e)}")
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < KEY_POOL_MAX_ATTEMPTS - 1:
+                    await asyncio.sleep(backoff_delay(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP))
+                continue
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+                last_error = Exception(f"HTTP {response.status_code}")
+                if attempt < KEY_POOL_MAX_ATTEMPTS - 1:
+                    await asyncio.sleep(backoff_delay(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP))
+                continue
+            self.breaker.record_success(time.monotonic() - started)
+            
+            if response.status_code == 200:
+                self.key_pool.report_success(key)
+                return response.json()
+            elif response.status_code == 429:  # Rate limit exceeded, cool this key down
+                self.key_pool.report_rate_limited(key, parse_retry_after(response.headers.get("Retry-After")))
+                last_error = None
                 continue
+            else:
+                response.raise_for_status()
         
-        raise HTTPException(status_code=503, detail="TMDB API unavailable")
+        if last_error is not None:
+            raise HTTPException(status_code=503, detail=f"TMDB API unavailable: {str(last_error)}")
+        raise HTTPException(
+            status_code=503, 
+            detail="TMDB API rate limit exceeded. Please try again later."
+        )
+    
+    async def get_page(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
+        """Raw TMDB payload for an endpoint (through the cache), for ingestion jobs"""
+        return await self._make_request(endpoint, params)
     
     def get_image_url(self, path: str, size: str = "w500") -> str:
         """Get full image URL from TMDB path"""
-        if not path:
-            return ""
-        return f"{self.image_base_url}/{size}{path}"
+        return image_url(path, size)
+    
+    @staticmethod
+    def pick_trailer(videos_payload: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Pick the YouTube trailer URL from a TMDB videos payload"""
+        videos = (videos_payload or {}).get("results", [])
+        
+        # Find YouTube trailer
+        for video in videos:
+            if (video.get("type") == "Trailer" and 
+                video.get("site") == "YouTube"):
+                return f"https://www.youtube.com/embed/{video['key']}"
+        
+        # If no trailer found, return first video
+        if videos:
+            return f"https://www.youtube.com/embed/{videos[0]['key']}"
+        
+        return None
     
     async def get_movie_trailer(self, movie_id: int) -> Optional[str]:
         """Get YouTube trailer URL for movie"""
         try:
-            data = await self._make_request(f"/movie/{movie_id}/videos")
-            videos = data.get("results", [])
-            
-            # Find YouTube trailer
-            for video in videos:
-                if (video.get("type") == "Trailer" and 
-                    video.get("site") == "YouTube"):
-                    return f"https://www.youtube.com/embed/{video['key']}"
-            
-            # If no trailer found, return first video
-            if videos:
-                return f"https://www.youtube.com/embed/{videos[0]['key']}"
-            
-            return None
+            return self.pick_trailer(await self._make_request(*videos_request("movie", movie_id)))
         except Exception:
             return None
     
     async def get_tv_trailer(self, tv_id: int) -> Optional[str]:
         """Get YouTube trailer URL for TV show"""
         try:
-            data = await self._make_request(f"/tv/{tv_id}/videos")
-            videos = data.get("results", [])
-            
-            # Find YouTube trailer
-            for video in videos:
-                if (video.get("type") == "Trailer" and 
-                    video.get("site") == "YouTube"):
-                    return f"https://www.youtube.com/embed/{video['key']}"
-            
-            # If no trailer found, return first video
-            if videos:
-                return f"https://www.youtube.com/embed/{videos[0]['key']}"
-            
-            return None
+            return self.pick_trailer(await self._make_request(*videos_request("tv", tv_id)))
         except Exception:
             return None
     
-    async def get_popular_movies(self, page: int = 1) -> List[Movie]:
-        """Get popular movies from TMDB"""
-        data = await self._make_request("/movie/popular", {"page": page})
-        movies = []
+    async def _get_details_with_videos(self, media_type: str, item_id: int) -> Dict[str, Any]:
+        """Fetch a movie/tv detail payload with its videos embedded (one upstream call)"""
+        data = await self._make_request(*details_request(media_type, item_id))
         
-        for item in data.get("results", []):
-            trailer_url = await self.get_movie_trailer(item["id"])
-            movie = Movie(
-                id=item["id"],
-                title=item["title"],
-                overview=item["overview"],
-                poster_path=self.get_image_url(item.get("poster_path", "")),
-                backdrop_path=self.get_image_url(item.get("backdrop_path", ""), "original"),
-                release_date=item.get("release_date"),
-                vote_average=item.get("vote_average", 0),
-                genre_ids=item.get("genre_ids", []),
-                media_type="movie",
-                trailer_url=trailer_url
-            )
-            movies.append(movie)
+        # Seed the videos cache so later trailer lookups for this item are hits
+        videos = data.get("videos")
+        videos_endpoint = f"/{media_type}/{item_id}/videos"
+        videos_ttl = cache_ttl_for(videos_endpoint) if CACHE_ENABLED else 0
+        if videos is not None and videos_ttl:
+            key = cache_key_for(videos_endpoint)
+            entry = self.cache.get(key)
+            if entry is None or not entry.is_fresh():
+                self.cache.set(key, videos, videos_ttl)
         
-        return movies
+        return data
     
-    async def get_trending_content(self, media_type: str = "all", time_window: str = "day") -> List[Movie]:
-        """Get trending movies and TV shows"""
-        data = await self._make_request(f"/trending/{media_type}/{time_window}")
-        content = []
+    async def get_trailers(self, items: List[Tuple[str, int]], return_exceptions: bool = False) -> List[Any]:
+        """Resolve trailers for (media_type, id) pairs concurrently, keeping input order.
         
-        for item in data.get("results", []):
-            media_type = item.get("media_type", "movie")
-            
-            # Get trailer based on media type
-            if media_type == "movie":
-                trailer_url = await self.get_movie_trailer(item["id"])
-                title = item.get("title", "")
-                date = item.get("release_date")
-            else:
-                trailer_url = await self.get_tv_trailer(item["id"])
-                title = item.get("name", "")
-                date = item.get("first_air_date")
-            
-            movie = Movie(
-                id=item["id"],
-                title=title,
-                overview=item["overview"],
-                poster_path=self.get_image_url(item.get("poster_path", "")),
-                backdrop_path=self.get_image_url(item.get("backdrop_path", ""), "original"),
-                release_date=date,
-                vote_average=item.get("vote_average", 0),
-                genre_ids=item.get("genre_ids", []),
-                media_type=media_type,
-                trailer_url=trailer_url
-            )
-            content.append(movie)
+        Failed lookups give None, or the exception itself with return_exceptions=True
+        so callers can tell "no trailer" from "could not check".
+        """
+        request_limit = asyncio.Semaphore(TRAILER_CONCURRENCY_PER_REQUEST)
+        
+        async def resolve(media_type: str, item_id: int) -> Optional[str]:
+            async with request_limit, self._trailer_limit:
+                try:
+                    return self.pick_trailer(await self._make_request(*videos_request(media_type, item_id)))
+                except Exception as e:
+                    if return_exceptions:
+                        return e
+                    return None
         
-        return content
+        return await asyncio.gather(*(resolve(media_type, item_id) for media_type, item_id in items))
     
-    async def get_movies_by_genre(self, genre_id: int, page: int = 1) -> List[Movie]:
+    async def _list_trailers(self, items: List[Tuple[str, int]], include_trailers: bool) -> List[Optional[str]]:
+        """Trailers for a result page, or all None when the caller opted out"""
+        if not include_trailers:
+            return [None] * len(items)
+        return await self.get_trailers(items)
+    
+    async def _list_movies(self, results: List[Dict[str, Any]], default_media_type: Optional[str], include_trailers: bool) -> List[Movie]:
+        """Normalize a results page into Movies, resolving trailers unless opted out"""
+        items = media_items(results, default_media_type)
+        trailers = await self._list_trailers([(media_type, item["id"]) for media_type, item in items], include_trailers)
+        return normalize_results(items, trailers)
+    
+    async def get_popular_movies(self, page: int = 1, include_trailers: bool = True) -> List[Movie]:
+        """Get popular movies from TMDB"""
+        data = await self._make_request(*popular_request(page))
+        return await self._list_movies(data.get("results", []), "movie", include_trailers)
+    
+    async def get_trending_content(self, media_type: str = "all", time_window: str = "day", include_trailers: bool = True) -> List[Movie]:
+        """Get trending movies and TV shows"""
+        data = await self._make_request(*trending_request(media_type, time_window))
+        return await self._list_movies(data.get("results", []), "movie", include_trailers)
+    
+    async def get_movies_by_genre(self, genre_id: int, page: int = 1, include_trailers: bool = True) -> List[Movie]:
         """Get movies by genre"""
-        data = await self._make_request("/discover/movie", {
-            "with_genres": genre_id,
-            "page": page,
-            "sort_by": "popularity.desc"
-        })
-        
-        movies = []
-        for item in data.get("results", []):
-            trailer_url = await self.get_movie_trailer(item["id"])
-            movie = Movie(
-                id=item["id"],
-                title=item["title"],
-                overview=item["overview"],
-                poster_path=self.get_image_url(item.get("poster_path", "")),
-                backdrop_path=self.get_image_url(item.get("backdrop_path", ""), "original"),
-                release_date=item.get("release_date"),
-                vote_average=item.get("vote_average", 0),
-                genre_ids=item.get("genre_ids", []),
-                media_type="movie",
-                trailer_url=trailer_url
-            )
-            movies.append(movie)
-        
-        return movies
+        data = await self._make_request(*genre_request(genre_id, page))
+        return await self._list_movies(data.get("results", []), "movie", include_trailers)
     
-    async def search_content(self, query: str, page: int = 1) -> List[Movie]:
+    async def search_content(self, query: str, page: int = 1, include_trailers: bool = True) -> List[Movie]:
         """Search for movies and TV shows"""
-        data = await self._make_request("/search/multi", {
-            "query": query,
-            "page": page
-        })
-        
-        results = []
-        for item in data.get("results", []):
-            media_type = item.get("media_type")
-            
-            if media_type not in ["movie", "tv"]:
-                continue
-            
-            # Get appropriate fields based on media type
-            if media_type == "movie":
-                trailer_url = await self.get_movie_trailer(item["id"])
-                title = item.get("title", "")
-                date = item.get("release_date")
-            else:
-                trailer_url = await self.get_tv_trailer(item["id"])
-                title = item.get("name", "")
-                date = item.get("first_air_date")
-            
-            movie = Movie(
-                id=item["id"],
-                title=title,
-                overview=item.get("overview", ""),
-                poster_path=self.get_image_url(item.get("poster_path", "")),
-                backdrop_path=self.get_image_url(item.get("backdrop_path", ""), "original"),
-                release_date=date,
-                vote_average=item.get("vote_average", 0),
-                genre_ids=item.get("genre_ids", []),
-                media_type=media_type,
-                trailer_url=trailer_url
-            )
-            results.append(movie)
-        
-        return results
+        data = await self._make_request(*search_request(query, page))
+        # Only movies and TV shows are returned (people are skipped)
+        return await self._list_movies(data.get("results", []), None, include_trailers)
     
     async def get_movie_details(self, movie_id: int) -> Optional[MovieDetail]:
         """Get detailed movie information"""
         try:
-            data = await self._make_request(f"/movie/{movie_id}")
-            trailer_url = await self.get_movie_trailer(movie_id)
+            data = await self._get_details_with_videos("movie", movie_id)
+            trailer_url = self.pick_trailer(data.get("videos"))
             
             return MovieDetail(
                 id=data["id"],
@@ -257,17 +511,6 @@ class TMDBService:
             all_genres[genre["id"]] = Genre(**genre)
         
         return list(all_genres.values())
-    
-    async def get_featured_movie(self) -> Optional[Movie]:
-        """Get a featured movie for hero section"""
-        # Get trending movies and pick the first one
-        trending = await self.get_trending_content("movie", "week")
-        if trending:
-            return trending[0]
-        
-        # Fallback to popular movies
-        popular = await self.get_popular_movies()
-        if popular:
-            return popular[0]
-        
-        return None
\ No newline at end of file
+
+# Process-wide service instance shared by all routers
+tmdb = TMDBService()
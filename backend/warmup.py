@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import time
+from functools import partial
+from datetime import datetime
+from typing import Any, Dict, Optional
+from tmdb_service import tmdb
+from featured import featured
+
+logger = logging.getLogger(__name__)
+
+# Startup warmup settings
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", "60"))
+WARMUP_GENRES = os.environ.get("WARMUP_GENRES", "true").lower() == "true"
+# Trending variants the browse page and the default HOME_ROWS ask for
+# (media_type:time_window); movie:week is already warmed by featured.refresh
+WARMUP_TRENDING = [
+    tuple(variant.split(":"))
+    for variant in os.environ.get("WARMUP_TRENDING", "all:week").split(",")
+    if ":" in variant
+]
+
+class Warmup:
+    """Preloads the TMDB data behind the home page into the cache.
+
+    Runs in the background after startup; the worker reports ready once it
+    has finished (or timed out) so a load balancer never routes users to a
+    cold worker.
+    """
+
+    def __init__(self):
+        self.state = "pending"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.duration: Optional[float] = None
+        self.tasks_total = 0
+        self.tasks_failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("done", "timeout", "disabled")
+
+    def start(self):
+        """Start warming up in the background (called from the app startup hook)"""
+        if not WARMUP_ENABLED:
+            self.state = "disabled"
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        self.state = "running"
+        self.started_at = datetime.utcnow()
+        started = time.monotonic()
+        logger.info("Warmup started")
+        try:
+            await asyncio.wait_for(self._prefetch(), WARMUP_TIMEOUT)
+            self.state = "done"
+        except asyncio.TimeoutError:
+            self.state = "timeout"
+            logger.warning("Warmup timed out after %ss, reporting ready anyway", int(WARMUP_TIMEOUT))
+        self.duration = round(time.monotonic() - started, 2)
+        self.finished_at = datetime.utcnow()
+        logger.info("Warmup %s in %.1fs (%d/%d tasks failed)",
+                    self.state, self.duration, self.tasks_failed, self.tasks_total)
+
+    async def _prefetch(self):
+        """Genres, hero, and page 1 of every home row (trailers included), concurrently"""
+        # Coroutines are created right before they are awaited so a timeout
+        # never leaves one behind unawaited
+        jobs = [tmdb.get_genres, featured.refresh, partial(tmdb.get_popular_movies, 1)]
+        jobs += [partial(tmdb.get_trending_content, media_type, time_window) for media_type, time_window in WARMUP_TRENDING]
+        results = await self._gather(jobs)
+
+        genres = results[0]
+        if isinstance(genres, Exception):
+            logger.warning("Warmup could not load genres: %s", genres)
+        elif WARMUP_GENRES:
+            await self._gather([partial(tmdb.get_movies_by_genre, genre.id, 1) for genre in genres])
+
+    async def _gather(self, jobs):
+        """Run job factories concurrently, counting failures"""
+        self.tasks_total += len(jobs)
+        results = await asyncio.gather(*(job() for job in jobs), return_exceptions=True)
+        self.tasks_failed += sum(1 for result in results if isinstance(result, Exception))
+        return results
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration,
+            "tasks_total": self.tasks_total,
+            "tasks_failed": self.tasks_failed,
+        }
+
+# Process-wide warmup state
+warmup = Warmup()
@@ -74,6 +74,21 @@ class NetflixAPITester:
         except Exception as e:
             self.log_result("Health Check", False, f"Exception: {str(e)}")
     
+    def test_readiness(self):
+        """Test readiness endpoint (turns ready once warmup has finished)"""
+        try:
+            response = self.make_request('GET', '/ready')
+            data = response.json()
+            
+            if response.status_code == 200 and data.get('ready'):
+                self.log_result("Readiness", True, f"Warmup: {data['warmup'].get('state')}")
+            elif response.status_code == 503 and not data.get('ready'):
+                self.log_result("Readiness", True, f"Still warming up: {data['warmup'].get('state')}")
+            else:
+                self.log_result("Readiness", False, f"HTTP {response.status_code}: {data}")
+        except Exception as e:
+            self.log_result("Readiness", False, f"Exception: {str(e)}")
+    
     def test_movies_featured(self):
         """Test featured movie endpoint"""
         try:
@@ -207,6 +222,58 @@ class NetflixAPITester:
         except Exception as e:
             self.log_result("Movie Search", False, f"Exception: {str(e)}")
     
+    def test_movies_trailers_batch(self):
+        """Test batch trailer endpoint"""
+        try:
+            response = self.make_request('GET', '/movies/trailers', params={'ids': '550,299536'})
+            
+            if response.status_code == 200:
+                trailers = response.json().get('trailers', {})
+                
+                if set(trailers.keys()) == {'550', '299536'}:
+                    found = [url for url in trailers.values() if url and 'youtube.com' in url]
+                    self.log_result("Batch Trailers", True, f"Resolved {len(found)} of {len(trailers)} trailers")
+                else:
+                    self.log_result("Batch Trailers", False, f"Unexpected ids: {list(trailers.keys())}")
+            else:
+                self.log_result("Batch Trailers", False, f"HTTP {response.status_code}: {response.text}")
+        except Exception as e:
+            self.log_result("Batch Trailers", False, f"Exception: {str(e)}")
+    
+    def test_movies_suggest(self):
+        """Test typeahead suggestions endpoint"""
+        try:
+            response = self.make_request('GET', '/movies/suggest', params={'prefix': 'a', 'limit': 5})
+            
+            if response.status_code == 200:
+                data = response.json()
+                
+                if isinstance(data, list) and len(data) <= 5 and all('id' in s and 'title' in s for s in data):
+                    self.log_result("Title Suggestions", True, f"Got {len(data)} suggestions")
+                else:
+                    self.log_result("Title Suggestions", False, "Invalid suggestion format", data)
+            else:
+                self.log_result("Title Suggestions", False, f"HTTP {response.status_code}: {response.text}")
+        except Exception as e:
+            self.log_result("Title Suggestions", False, f"Exception: {str(e)}")
+    
+    def test_home_feed(self):
+        """Test aggregated home feed endpoint"""
+        try:
+            response = self.make_request('GET', '/home')
+            
+            if response.status_code == 200:
+                data = response.json()
+                
+                if 'rows' in data and all('title' in row and 'movies' in row for row in data['rows']):
+                    self.log_result("Home Feed", True, f"Got {len(data['rows'])} rows")
+                else:
+                    self.log_result("Home Feed", False, "Invalid home feed format", data)
+            else:
+                self.log_result("Home Feed", False, f"HTTP {response.status_code}: {response.text}")
+        except Exception as e:
+            self.log_result("Home Feed", False, f"Exception: {str(e)}")
+    
     def test_user_registration(self):
         """Test user registration"""
         try:
@@ -383,6 +450,7 @@ class NetflixAPITester:
         
         # Health and basic functionality
         self.test_health_check()
+        self.test_readiness()
         
         # Movies API tests
         self.test_movies_featured()
@@ -390,6 +458,9 @@ class NetflixAPITester:
         self.test_movies_trending()
         self.test_movies_by_genre()
         self.test_movies_search()
+        self.test_movies_trailers_batch()
+        self.test_movies_suggest()
+        self.test_home_feed()
         
         # Authentication flow
         self.test_user_registration()
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import pytest
+import tmdb_resilience
+from tmdb_resilience import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tmdb_resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def breaker(**options):
+    settings = dict(window=10, min_calls=4, error_threshold=0.5, slow_call_seconds=1.0,
+                    slow_threshold=0.8, open_seconds=30.0, half_open_probes=2)
+    settings.update(options)
+    return CircuitBreaker(**settings)
+
+
+def call(cb, ok=True, latency=0.1):
+    assert cb.allow_request()
+    if ok:
+        cb.record_success(latency)
+    else:
+        cb.record_failure()
+
+
+def trip(cb):
+    for ok in (True, False, True, False):
+        call(cb, ok)
+    assert cb.state == CircuitBreaker.OPEN
+
+
+def test_stays_closed_below_min_calls_and_threshold(clock):
+    cb = breaker()
+    for ok in (False, False, False):
+        call(cb, ok)
+    assert cb.state == CircuitBreaker.CLOSED
+    cb = breaker()
+    for ok in (True, True, True, False):
+        call(cb, ok)
+    assert cb.state == CircuitBreaker.CLOSED
+
+
+def test_opens_on_error_rate_and_rejects_until_open_seconds(clock):
+    cb = breaker()
+    trip(cb)
+    assert not cb.allow_request()
+    clock.now += 29.9
+    assert not cb.allow_request()
+    assert cb.rejected == 2
+    clock.now += 0.2
+    assert cb.allow_request()
+    assert cb.state == CircuitBreaker.HALF_OPEN
+
+
+def test_opens_on_slow_call_rate(clock):
+    cb = breaker()
+    for _ in range(4):
+        call(cb, latency=2.0)
+    assert cb.state == CircuitBreaker.OPEN
+
+
+def test_half_open_closes_after_successful_probes(clock):
+    cb = breaker()
+    trip(cb)
+    clock.now += 30
+    assert cb.allow_request() and cb.allow_request()
+    assert not cb.allow_request()  # only half_open_probes trial calls
+    cb.record_success(0.1)
+    cb.record_success(0.1)
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.stats()["window_calls"] == 0
+
+
+def test_half_open_failure_or_slow_probe_reopens(clock):
+    cb = breaker()
+    trip(cb)
+    clock.now += 30
+    call(cb, ok=False)
+    assert cb.state == CircuitBreaker.OPEN and cb.times_opened == 2
+
+    clock.now += 30
+    call(cb, latency=2.0)
+    assert cb.state == CircuitBreaker.OPEN and cb.times_opened == 3
+
+
+def test_release_frees_probe_slot(clock):
+    cb = breaker()
+    trip(cb)
+    clock.now += 30
+    assert cb.allow_request() and cb.allow_request()
+    assert not cb.allow_request()
+    cb.release()  # e.g. no API key was available, nothing reached TMDB
+    assert cb.allow_request()
+    assert cb.state == CircuitBreaker.HALF_OPEN
+
+
+def test_release_is_a_no_op_when_closed(clock):
+    cb = breaker()
+    cb.release()
+    call(cb)
+    assert cb.state == CircuitBreaker.CLOSED
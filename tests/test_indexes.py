@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from pymongo import ASCENDING, IndexModel
+from indexes import find_index
+
+
+def spec(**options):
+    return {"v": 2, "key": [("created_at", ASCENDING)], **options}
+
+
+def test_ttl_zero_is_not_a_plain_index():
+    ttl = IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=0)
+    plain = IndexModel([("created_at", ASCENDING)], name="created_at")
+    assert find_index({"created_at_1": spec()}, ttl) == ("created_at_1", False)
+    assert find_index({"created_at_1": spec(expireAfterSeconds=0)}, plain) == ("created_at_1", False)
+    assert find_index({"created_at_1": spec(expireAfterSeconds=0)}, ttl) == ("created_at_1", True)
+
+
+def test_false_flags_match_unset_flags():
+    plain = IndexModel([("created_at", ASCENDING)], name="created_at")
+    assert find_index({"created_at_1": spec(unique=False, sparse=False)}, plain) == ("created_at_1", True)
+    unique = IndexModel([("created_at", ASCENDING)], name="created_at", unique=True)
+    assert find_index({"created_at_1": spec()}, unique) == ("created_at_1", False)
+
+
+def test_other_key_patterns_are_not_matched():
+    model = IndexModel([("created_at", ASCENDING), ("email", ASCENDING)], name="compound")
+    assert find_index({"created_at_1": spec()}, model) is None
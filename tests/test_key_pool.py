@@ -0,0 +1,94 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import pytest
+import tmdb_resilience
+from tmdb_resilience import KeyPool, parse_retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tmdb_resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_tokens_refill_at_rate_up_to_burst(clock):
+    pool = KeyPool(["a"], rate=2.0, burst=3.0)
+    assert [pool.try_acquire() is not None for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5  # one token back
+    assert pool.try_acquire() is not None
+    assert pool.try_acquire() is None
+    clock.now += 60  # capped at burst
+    assert sum(pool.try_acquire() is not None for _ in range(5)) == 3
+
+
+def test_picks_key_with_most_tokens(clock):
+    pool = KeyPool(["a", "b"], rate=1.0, burst=4.0)
+    picked = [pool.try_acquire().key for _ in range(4)]
+    assert sorted(picked) == ["a", "a", "b", "b"]
+
+
+def test_cooling_key_is_skipped_for_retry_after(clock):
+    pool = KeyPool(["a", "b"], rate=1.0, burst=10.0)
+    a = pool.keys[0]
+    pool.report_rate_limited(a, retry_after=5)
+    assert all(pool.try_acquire().key == "b" for _ in range(5))
+    pool.report_rate_limited(pool.keys[1], retry_after=100)
+    clock.now += 4.9
+    assert pool.try_acquire() is None
+    clock.now += 0.2
+    assert pool.try_acquire().key == "a"
+
+
+def test_backoff_without_retry_after_grows_and_resets(clock, monkeypatch):
+    monkeypatch.setattr(tmdb_resilience.random, "uniform", lambda low, high: high)
+    pool = KeyPool(["a"], backoff_base=1.0, backoff_cap=8.0)
+    state = pool.keys[0]
+    cooldowns = []
+    for _ in range(5):
+        pool.report_rate_limited(state)
+        cooldowns.append(state.cooldown_until - clock.now)
+    assert cooldowns == [1.0, 2.0, 4.0, 8.0, 8.0]
+    pool.report_success(state)
+    pool.report_rate_limited(state)
+    assert state.cooldown_until - clock.now == 1.0
+
+
+def test_next_available_in_covers_cooldown_and_refill(clock):
+    pool = KeyPool(["a"], rate=2.0, burst=1.0)
+    pool.try_acquire()
+    assert pool.next_available_in() == pytest.approx(0.5)
+    pool.report_rate_limited(pool.keys[0], retry_after=3)
+    assert pool.next_available_in() == pytest.approx(3.0)
+
+
+def test_acquire_gives_up_past_max_wait(clock):
+    pool = KeyPool(["a"], rate=1.0, burst=1.0)
+    pool.try_acquire()
+    pool.report_rate_limited(pool.keys[0], retry_after=10)
+    assert asyncio.run(pool.acquire(max_wait=1)) is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_needs_a_key():
+    with pytest.raises(ValueError):
+        KeyPool(["", None])
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from search_index import SearchIndex, SEARCH_PAGE_SIZE
+from tmdb_normalize import MovieRecord
+from tmdb_service import TMDBService
+
+
+def record(item_id, title, overview=""):
+    return MovieRecord(item_id, "movie", title, overview, None, None, None, 0.0, None)
+
+
+def index_with(count, title="Zorro"):
+    index = SearchIndex()
+    for item_id in range(count):
+        index.add(record(item_id, f"{title} {item_id}"), popularity=item_id)
+    return index
+
+
+def test_full_pages_are_answered_locally_in_rank_order():
+    index = index_with(2 * SEARCH_PAGE_SIZE)
+    first = index.search("zorro", 1)
+    second = index.search("zorro", 2)
+    assert len(first) == len(second) == SEARCH_PAGE_SIZE
+    ids = [movie.id for movie in first + second]
+    assert ids == list(range(2 * SEARCH_PAGE_SIZE - 1, -1, -1))
+
+
+def test_pages_local_hits_cannot_fill_go_to_tmdb():
+    index = index_with(SEARCH_PAGE_SIZE + 7)
+    assert len(index.search("zorro", 1)) == SEARCH_PAGE_SIZE
+    assert index.search("zorro", 2) is None
+    assert index.search("zorro", 3) is None
+
+
+def test_too_few_hits_go_to_tmdb():
+    index = index_with(7)
+    assert index.search("zorro", 1) is None
+    assert index.search("zorro", 1, min_results=0) is None
+
+
+def test_every_term_must_match_and_updates_replace_old_text():
+    index = index_with(SEARCH_PAGE_SIZE)
+    index.add(record(100, "Mask of Zorro"), popularity=500)
+    assert index.search("mask zorro", 1, min_results=0) is None
+    assert index.search("zorro", 1)[0].id == 100
+
+    index.add(record(100, "The Legend"), popularity=500)
+    assert 100 not in [movie.id for movie in index.search("zorro", 1)]
+    assert len(index) == SEARCH_PAGE_SIZE + 1
+
+
+def test_search_pages_are_not_indexed():
+    index = SearchIndex()
+    service = TMDBService()
+    service.add_results_listener(index.add_results)
+    items = [{"id": i, "media_type": "movie", "title": f"Zorro {i}"} for i in range(SEARCH_PAGE_SIZE)]
+    service._notify_results("/search/multi", {"results": items})
+    assert len(index) == 0
+    service._notify_results("/movie/popular", {"results": items})
+    assert len(index) == SEARCH_PAGE_SIZE
@@ -0,0 +1,90 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from search_index import SuggestIndex, suggest_key, SUGGEST_MAX_WORD_STARTS
+
+WORDS = ["the", "dark", "knight", "star", "wars", "trek", "batman", "begins", "return", "day", "time", "tomorrow"]
+PREFIXES = ["t", "th", "the d", "da", "dark", "dark ", "s", "star", "star ", "b", "bat", "r", "k", "tim", "to"]
+
+
+def brute_force(titles, prefix, k):
+    """Top-k (media_type, id) by popularity among titles matching prefix at a title or word start"""
+    text = suggest_key(prefix) + (" " if prefix.endswith(" ") else "")
+    matches = []
+    for key, (title, popularity) in titles.items():
+        words = suggest_key(title).split(" ")
+        starts = [" ".join(words[i:]) for i in range(min(len(words), SUGGEST_MAX_WORD_STARTS + 1))]
+        if any(start.startswith(text) for start in starts):
+            matches.append((popularity, key))
+    matches.sort(reverse=True)
+    return [popularity for popularity, _ in matches[:k]]
+
+
+def check(index, titles, k):
+    for prefix in PREFIXES:
+        got = index.suggest(prefix, k)
+        expected = brute_force(titles, prefix, k)
+        got_popularity = [titles[(s["media_type"], s["id"])][1] for s in got]
+        assert got_popularity == expected, prefix
+
+
+def random_title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+
+
+def test_suggest_matches_brute_force_after_refreshes_and_renames():
+    rng = random.Random(7)
+    index = SuggestIndex(top_k=10)
+    titles = {}
+
+    # Distinct popularities exactly representable as float32 so ranks have no ties
+    def popularity():
+        return float(rng.randrange(1, 1_000_000))
+
+    for item_id in range(300):
+        media_type = rng.choice(["movie", "tv"])
+        title = random_title(rng)
+        titles[(media_type, item_id)] = (title, popularity())
+        index.add(item_id, media_type, title, titles[(media_type, item_id)][1])
+    check(index, titles, 10)
+
+    for _ in range(3):
+        # Popularity refresh: every title re-added, some drop sharply
+        for (media_type, item_id), (title, _) in titles.items():
+            titles[(media_type, item_id)] = (title, popularity())
+            index.add(item_id, media_type, title, titles[(media_type, item_id)][1])
+        check(index, titles, 10)
+
+    # Renames must not leave the old title behind
+    for (media_type, item_id) in rng.sample(sorted(titles), 60):
+        title = random_title(rng)
+        titles[(media_type, item_id)] = (title, popularity())
+        index.add(item_id, media_type, title, titles[(media_type, item_id)][1])
+    check(index, titles, 10)
+    assert len(index) == len(titles)
+
+
+def test_suggest_returns_full_page_when_enough_live_matches():
+    index = SuggestIndex(top_k=10)
+    for item_id in range(12):
+        index.add(item_id, "movie", f"Dark {item_id}", 100 + item_id)
+    # The two most popular are renamed away from the prefix
+    index.add(11, "movie", "Light 11", 111)
+    index.add(10, "movie", "Light 10", 110)
+    assert [s["id"] for s in index.suggest("dark", 10)] == list(range(9, -1, -1))
+
+
+def test_generation_only_moves_on_real_changes():
+    index = SuggestIndex(top_k=10)
+    index.add(1, "movie", "Dark City", 10.1)
+    generation = index.generation
+    index.add(1, "movie", "Dark City", 10.1)
+    assert index.generation == generation
+    index.add(1, "movie", "Dark City", 12.0)
+    assert index.generation > generation
+    generation = index.generation
+    index._rebuild()
+    assert index.generation == generation